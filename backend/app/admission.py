@@ -0,0 +1,188 @@
+import asyncio
+import heapq
+import itertools
+import math
+from collections import Counter
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from starlette.responses import JSONResponse
+
+from backend.app.config import ADMISSION_ENABLED, ADMISSION_MAX_CONCURRENCY, ADMISSION_USER_CONCURRENCY, \
+    ADMISSION_PRIORITY_RESERVE, ADMISSION_QUEUE_TIMEOUT, ADMISSION_POOL_WAIT_THRESHOLD_MS
+from backend.app.database import engines
+
+# Классы запросов, от более срочных: смена статуса и решение по предложению — короткие изменения,
+# которые не должны ждать за списками и выгрузками
+PRIORITY = 0
+WRITE = 1
+READ = 2
+CLASS_NAMES = {PRIORITY: "priority", WRITE: "write", READ: "read"}
+
+PRIORITY_PATHS = ("/api/bids/submit_decision",)
+# Не проходят допуск: проверки состояния и метрики, а лента изменений не держит соединение с базой во время ожидания
+EXEMPT_PREFIXES = ("/api/ping", "/api/health/", "/api/events", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+
+def request_class(method: str, path: str) -> int:
+    if (method == "PATCH" and path.endswith("/status")) or (method == "POST" and path in PRIORITY_PATHS):
+        return PRIORITY
+    if method in ("GET", "HEAD"):
+        return READ
+    return WRITE
+
+
+def request_user(scope) -> Optional[str]:
+    # Пользователь API определяется параметром username; анонимные запросы (в основном из кэша) ограничены
+    # только общим лимитом воркера
+    for name, value in parse_qsl(scope.get("query_string", b"").decode("latin-1")):
+        if name == "username" and value:
+            return value
+    return None
+
+
+def pool_wait() -> float:
+    return max(target.pool.wait_stats.recent_wait() for target in engines())
+
+
+def rejection(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code,
+                        headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+class AdmissionController:
+    # Ограничивает число одновременных запросов воркера до того, как они займут соединения пула. Лишние запросы
+    # ждут в очереди по приоритету класса, а не в очереди пула; последние priority_reserve мест достаются только
+    # дешевым изменениям. Пользователь сверх своего лимита получает 429, переполнение воркера — 503
+    def __init__(self, max_concurrency: int, user_concurrency: int, priority_reserve: int, queue_timeout: float,
+                 pool_wait_threshold: float):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.user_concurrency = user_concurrency
+        self.priority_reserve = min(max(priority_reserve, 0), self.max_concurrency - 1)
+        self.queue_timeout = queue_timeout
+        self.pool_wait_threshold = pool_wait_threshold
+        self.in_flight = 0
+        self.users = Counter()
+        self.rejected = Counter()
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    def _capacity(self, request_type: int) -> int:
+        return self.max_concurrency if request_type == PRIORITY else self.max_concurrency - self.priority_reserve
+
+    def _prune(self):
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+
+    def _can_enter(self, request_type: int) -> bool:
+        # Новый запрос не обгоняет ожидающие запросы того же или более срочного класса
+        self._prune()
+        return self.in_flight < self._capacity(request_type) and (
+            not self._waiters or self._waiters[0][0] > request_type)
+
+    def _wake(self):
+        while True:
+            self._prune()
+            if not self._waiters or self.in_flight >= self._capacity(self._waiters[0][0]):
+                return
+            _, _, future = heapq.heappop(self._waiters)
+            self.in_flight += 1
+            future.set_result(True)
+
+    async def _wait(self, request_type: int) -> bool:
+        # True — место передано запросу при освобождении
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (request_type, next(self._sequence), future))
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _reject(self, reason: str, status_code: int, detail: str, retry_after: float) -> JSONResponse:
+        self.rejected[reason] += 1
+        return rejection(status_code, detail, retry_after)
+
+    async def acquire(self, user: Optional[str], request_type: int) -> Optional[JSONResponse]:
+        # None — запрос допущен и должен вызвать release; иначе ответ с отказом
+        if user is not None and self.user_concurrency and self.users[user] >= self.user_concurrency:
+            return self._reject("user", 429, "Too many concurrent requests for this user", 1)
+        if request_type != PRIORITY and self.pool_wait_threshold:
+            waited = pool_wait()
+            if waited * 1000 > self.pool_wait_threshold:
+                return self._reject("pool", 503, "Server is overloaded, retry later", waited)
+
+        self._hold_user(user)
+        admitted = self._can_enter(request_type)
+        if admitted:
+            self.in_flight += 1
+        else:
+            try:
+                admitted = await self._wait(request_type)
+            finally:
+                if not admitted:
+                    self._release_user(user)
+        if not admitted:
+            return self._reject("queue", 503, "Server is overloaded, retry later", self.queue_timeout)
+        return None
+
+    def _hold_user(self, user: Optional[str]):
+        if user is not None:
+            self.users[user] += 1
+
+    def _release_user(self, user: Optional[str]):
+        if user is not None:
+            self.users[user] -= 1
+            if self.users[user] <= 0:
+                del self.users[user]
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def release(self, user: Optional[str]):
+        self._release_user(user)
+        self._release_slot()
+
+    def status(self) -> dict:
+        self._prune()
+        queued = Counter(CLASS_NAMES[request_type] for request_type, _, future in self._waiters
+                         if not future.done())
+        return {
+            "max_concurrency": self.max_concurrency,
+            "user_concurrency": self.user_concurrency,
+            "priority_reserve": self.priority_reserve,
+            "in_flight": self.in_flight,
+            "queued": dict(queued),
+            "users": len(self.users),
+            "rejected": dict(self.rejected),
+            "pool_wait_recent_ms": pool_wait() * 1000
+        }
+
+
+admission = AdmissionController(ADMISSION_MAX_CONCURRENCY, ADMISSION_USER_CONCURRENCY, ADMISSION_PRIORITY_RESERVE,
+                                ADMISSION_QUEUE_TIMEOUT, ADMISSION_POOL_WAIT_THRESHOLD_MS)
+
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_ENABLED or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        user = request_user(scope)
+        refused = await admission.acquire(user, request_class(scope["method"], scope["path"]))
+        if refused is not None:
+            await refused(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release(user)
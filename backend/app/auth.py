@@ -0,0 +1,115 @@
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL
+from backend.app.models import Employee, OrganizationResponsible
+from backend.app.notifications import listener
+
+IDENTITY_CHANGED_CHANNEL = "identity_changed"
+
+
+class Identity(NamedTuple):
+    id: UUID
+    username: str
+    organization_ids: tuple
+
+    def is_responsible_for(self, organization_id: UUID) -> bool:
+        return organization_id in self.organization_ids
+
+
+class IdentityCache:
+    # generation растет при каждом сбросе: пользователь, загруженный до сброса, в кэш не попадает
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, username: str) -> Optional[Identity]:
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        identity, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[username]
+            return None
+        self._entries.move_to_end(username)
+        return identity
+
+    def put(self, username: str, identity: Identity, generation: int):
+        if not self.enabled or generation != self.generation:
+            return
+        self._entries[username] = (identity, time.monotonic() + self.ttl)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self, *args):
+        self.generation += 1
+        self._entries.clear()
+
+
+identity_cache = IdentityCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
+
+if identity_cache.enabled:
+    listener.subscribe(IDENTITY_CHANGED_CHANNEL, identity_cache.clear)
+    listener.on_reconnect(identity_cache.clear)
+
+
+async def load_identity(username: str, db: AsyncSession) -> Optional[Identity]:
+    # Сотрудник и все его организации одним запросом
+    row = (await db.execute(
+        select(
+            Employee.id,
+            Employee.username,
+            func.array_remove(func.array_agg(OrganizationResponsible.organization_id), None)
+        )
+        .outerjoin(OrganizationResponsible, OrganizationResponsible.user_id == Employee.id)
+        .where(Employee.username == username)
+        .group_by(Employee.id)
+    )).first()
+    if row is None:
+        return None
+    return Identity(id=row[0], username=row[1], organization_ids=tuple(row[2]))
+
+
+async def resolve_identity(username: str, db: AsyncSession) -> Optional[Identity]:
+    # Сначала кэш запроса (db.info живет столько же, сколько сессия), затем общий кэш воркера
+    request_identities = db.info.setdefault("identities", {})
+    if username in request_identities:
+        return request_identities[username]
+
+    identity = identity_cache.get(username)
+    if identity is None:
+        # Уведомление identity_changed во время загрузки сбрасывает кэш; загруженное до него значение не кэшируется
+        generation = identity_cache.generation
+        identity = await load_identity(username, db)
+        if identity is not None:
+            identity_cache.put(username, identity, generation)
+
+    request_identities[username] = identity
+    return identity
+
+
+async def get_user_by_username(username: str, db: AsyncSession) -> Identity:
+    if not username:
+        raise HTTPException(status_code=403, detail="Unauthorized user")
+    user = await resolve_identity(username, db)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+def check_user_responsibility(user: Identity, organization_id: UUID):
+    if not user.is_responsible_for(organization_id):
+        raise HTTPException(status_code=403, detail="User is not authorized for this organization")
@@ -0,0 +1,163 @@
+import asyncio
+import importlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from backend.app.config import PUBLIC_TENDER_CACHE_BACKEND, PUBLIC_TENDER_CACHE_OPTIONS, PUBLIC_TENDER_CACHE_SIZE, \
+    PUBLIC_TENDER_CACHE_TTL
+from backend.app.etags import ETAG_HEADER, matches
+from backend.app.notifications import listener
+
+TENDERS_CHANGED_CHANNEL = "tenders_changed"
+GENERATION_KEY = "public_tenders:generation"
+
+
+class CacheBackend(ABC):
+    # Хранилище кэша. shared=True — хранилище действительно общее для всех воркеров (например, Redis):
+    # сброс поколения одним воркером виден остальным, и уведомления tenders_changed не нужны.
+    # Хранилище в памяти процесса общим не является: сбросы других воркеров до него дошли бы только по TTL
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str):
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value, ttl: float):
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+
+class LocalCacheBackend(CacheBackend):
+    # LRU в памяти процесса; другие воркеры сбрасываются уведомлением tenders_changed
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get_nowait(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set_nowait(self, key: str, value, ttl: Optional[float]):
+        self._entries[key] = (value, time.monotonic() + ttl if ttl else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def incr_nowait(self, key: str) -> int:
+        value = (self.get_nowait(key) or 0) + 1
+        self.set_nowait(key, value, None)
+        return value
+
+    async def get(self, key: str):
+        return self.get_nowait(key)
+
+    async def set(self, key: str, value, ttl: float):
+        self.set_nowait(key, value, ttl)
+
+    async def incr(self, key: str) -> int:
+        return self.incr_nowait(key)
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    headers: tuple
+
+    def response(self, request: Request) -> Response:
+        headers = dict(self.headers)
+        if matches(request.headers.get("if-none-match"), headers.get(ETAG_HEADER.lower())):
+            return Response(status_code=304, headers={ETAG_HEADER: headers[ETAG_HEADER.lower()]})
+        return Response(self.body, media_type="application/json", headers=headers)
+
+    @classmethod
+    def from_response(cls, response: Response) -> "CachedPage":
+        return cls(response.body, tuple((name, value) for name, value in response.headers.items()
+                                        if name != "content-length"))
+
+
+class PublicTenderCache:
+    # Кэш ответов анонимного списка опубликованных тендеров. Ключ включает поколение: запись, вычисленная до
+    # сброса, сохраняется под старым поколением и больше не читается
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._inflight = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None and self.ttl > 0
+
+    async def get_or_compute(self, key: tuple, compute) -> CachedPage:
+        generation = await self.backend.get(GENERATION_KEY) or 0
+        full_key = f"public_tenders:{generation}:{key!r}"
+        page = await self.backend.get(full_key)
+        if page is not None:
+            return page
+
+        # Защита от лавины: холодный ключ вычисляет один запрос воркера, остальные ждут его результат
+        future = self._inflight.get(full_key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            page = CachedPage.from_response(await compute())
+            await self.backend.set(full_key, page, self.ttl)
+            future.set_result(page)
+            return page
+        except BaseException as e:
+            future.set_exception(e)
+            # Исключение уже получил вычисляющий запрос; ожидающих может не быть
+            future.exception()
+            raise
+        finally:
+            del self._inflight[full_key]
+
+    async def invalidate(self):
+        if self.backend is not None:
+            await self.backend.incr(GENERATION_KEY)
+
+    def invalidate_local(self, *args):
+        self.backend.incr_nowait(GENERATION_KEY)
+
+
+def create_backend(name: str, **options) -> CacheBackend:
+    # local — LRU процесса; иначе путь к классу общего хранилища вида "package.module:ClassName".
+    # options передаются конструктору хранилища как есть
+    if name == "local":
+        return LocalCacheBackend(**options)
+    module_name, class_name = name.split(":")
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    if not issubclass(backend_class, CacheBackend):
+        raise TypeError(f"{name} is not a CacheBackend")
+    return backend_class(**options)
+
+
+def public_tenders_backend() -> Optional[CacheBackend]:
+    if PUBLIC_TENDER_CACHE_BACKEND != "local":
+        return create_backend(PUBLIC_TENDER_CACHE_BACKEND, **PUBLIC_TENDER_CACHE_OPTIONS)
+    if PUBLIC_TENDER_CACHE_SIZE <= 0:
+        return None
+    return create_backend("local", max_size=PUBLIC_TENDER_CACHE_SIZE)
+
+
+public_tenders_cache = PublicTenderCache(public_tenders_backend(), PUBLIC_TENDER_CACHE_TTL)
+
+if public_tenders_cache.enabled and not public_tenders_cache.backend.shared:
+    listener.subscribe(TENDERS_CHANGED_CHANNEL, public_tenders_cache.invalidate_local)
+    listener.on_reconnect(public_tenders_cache.invalidate_local)
@@ -1,22 +1,81 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from backend.app.config import DATABASE_URL
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import Session, raiseload
+from backend.app.config import ASYNC_DATABASE_URL, ASYNC_REPLICA_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, \
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STRICT_LOADING
+from backend.app.metrics import instrument_engine
+from backend.app.migrations import apply_migrations
+from backend.app.pool import InstrumentedAsyncQueuePool
+from backend.app.slow_queries import slow_query_log
 
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+def create_db_engine(url: str):
+    created = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+    instrument_engine(created.sync_engine)
+    slow_query_log.install(created)
+    return created
 
-try:
-    with engine.connect() as connection:
-        print("Connection success!")
-except OperationalError as e:
-    print(f"Error: {e}")
-except Exception as e:
-    print(f"Error: {e}")
 
+engine = create_db_engine(ASYNC_DATABASE_URL)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+# Реплика для чтения; без POSTGRES_REPLICA_CONN все запросы идут на первичный сервер (см. replica.py)
+replica_engine = create_db_engine(ASYNC_REPLICA_DATABASE_URL) if ASYNC_REPLICA_DATABASE_URL else None
+ReplicaSessionLocal = async_sessionmaker(replica_engine, class_=AsyncSession, autoflush=False,
+                                         expire_on_commit=False) if replica_engine else None
+
+
+def forbid_lazy_loads(orm_execute_state):
+    # Явные стратегии (selectinload, joinedload) в запросе имеют приоритет над raiseload("*")
+    if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*", sql_only=True))
+
+
+if DB_STRICT_LOADING:
+    event.listen(Session, "do_orm_execute", forbid_lazy_loads)
+
+
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
+
+
+async def init_db():
+    async with engine.begin() as connection:
+        for migration in await connection.run_sync(apply_migrations):
+            print(f"Applied migration {migration}")
+
+
+async def warm_up_pool(connections: int):
+    # Заранее открывает соединения, чтобы первые запросы не ждали установки соединения
+    opened = []
+    try:
+        for _ in range(min(connections, DB_POOL_SIZE)):
+            opened.append(await engine.connect())
+    finally:
+        for connection in opened:
+            await connection.close()
+    return len(opened)
+
+
+def engines():
+    return [target for target in (engine, replica_engine) if target is not None]
+
+
+async def reset_pools():
+    # Воркер не использует соединения, унаследованные от родительского процесса при fork: пул очищается без их закрытия
+    for target in engines():
+        await target.dispose(close=False)
+
+
+async def dispose_engines():
+    for target in engines():
+        await target.dispose()
@@ -0,0 +1,80 @@
+import hashlib
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.events import HORIZON
+from backend.app.models.event import ChangeEvent
+
+ETAG_HEADER = "ETag"
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class Precondition(NamedTuple):
+    # Версия, от которой клиент вносит изменение: If-Match (нарушение — 412) или expected_version (409).
+    # Без условия изменение все равно отклоняется с 409, если строка устарела или изменилась после чтения
+    version: Optional[int] = None
+    status_code: int = 409
+
+    def check(self, row):
+        if not row.is_current or (self.version is not None and self.version != row.version):
+            self.fail()
+
+    def fail(self):
+        raise self.error()
+
+    def error(self) -> HTTPException:
+        return HTTPException(status_code=self.status_code,
+                             detail="Version conflict: the entity has been changed, reload it and retry")
+
+
+def precondition(if_match: Optional[str], expected_version: Optional[int]) -> Precondition:
+    # If-Match: "3" (версия сущности из ответа); If-Match: * — любая текущая версия
+    if not if_match:
+        return Precondition(expected_version, 409)
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    if tag == "*":
+        return Precondition(None, 412)
+    if not tag.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must contain the entity version")
+    return Precondition(int(tag), 412)
+
+
+async def list_etag(db: AsyncSession, request: Request, events: tuple, *scope) -> str:
+    # Отпечаток набора — положение последнего изменения в его области по журналу change_event: events — условия
+    # на журнал, охватывающие все изменения, которые могут затронуть список (см. events.visible_events).
+    # Событие транзакции ниже горизонта (все более ранние завершены) определяет последнее изменение; события
+    # транзакций выше горизонта могли зафиксироваться не по порядку и учитываются числом, которое только растет,
+    # пока горизонт их не пройдет. Поэтому любое новое видимое событие меняет отпечаток.
+    # Если события области удалены по EVENTS_RETENTION, вместо последнего берется самое раннее сохраненное событие
+    latest = (
+        select(ChangeEvent.id)
+        .where(*events, ChangeEvent.txid < HORIZON)
+        .order_by(ChangeEvent.txid.desc(), ChangeEvent.id.desc())
+        .limit(1)
+    )
+    pending = select(func.count()).select_from(ChangeEvent).where(*events, ChangeEvent.txid >= HORIZON)
+    latest_id, pending_count, floor_id = (await db.execute(select(
+        latest.scalar_subquery(), pending.scalar_subquery(), select(func.min(ChangeEvent.id)).scalar_subquery()
+    ))).one()
+    position = latest_id if latest_id is not None else f"before {floor_id}"
+    fingerprint = "|".join(str(part) for part in (request.url.path, request.url.query, position, pending_count, *scope))
+    return '"' + hashlib.sha1(fingerprint.encode()).hexdigest() + '"'
+
+
+async def not_modified(db: AsyncSession, request: Request, response: Response, events: tuple,
+                       *scope) -> Optional[Response]:
+    # 304 Not Modified, если клиент прислал актуальный ETag; иначе ETag выставляется в ответ списка
+    etag = await list_etag(db, request, events, *scope)
+    if matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={ETAG_HEADER: etag})
+    response.headers[ETAG_HEADER] = etag
+    return None
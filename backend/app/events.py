@@ -0,0 +1,289 @@
+import asyncio
+import time
+from collections import deque
+from datetime import timedelta
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import EVENTS_BATCH_SIZE, EVENTS_BUFFER_SIZE, EVENTS_POLL_INTERVAL, EVENTS_RETENTION
+from backend.app.database import SessionLocal
+from backend.app.models.event import ChangeEvent
+from backend.app.notifications import listener
+from backend.app.schemas.event import ChangeEventResponse
+
+CHANGE_EVENTS_CHANNEL = "change_events"
+TENDER = "tender"
+BID = "bid"
+
+# Пока более ранняя транзакция не завершилась, журнал перечитывается с нарастающей паузой до EVENTS_POLL_INTERVAL
+PENDING_RETRY_DELAY = 0.05
+CLEANUP_INTERVAL = 60
+
+# Граница завершенных транзакций: все транзакции с txid меньше нее зафиксированы или отменены
+HORIZON = func.txid_snapshot_xmin(func.txid_current_snapshot())
+POSITION = tuple_(ChangeEvent.txid, ChangeEvent.id)
+
+event_adapter = TypeAdapter(ChangeEventResponse)
+
+
+def visible_events(entity: str, organization_ids: tuple) -> tuple:
+    # Условия FeedEvent.visible_to для выборки из журнала
+    published = or_(ChangeEvent.status == "PUBLISHED", ChangeEvent.previous_status == "PUBLISHED")
+    own = ChangeEvent.organization_id.in_(organization_ids)
+    if entity == TENDER:
+        return ChangeEvent.entity == TENDER, or_(published, own)
+    return ChangeEvent.entity == BID, or_(own, and_(published, ChangeEvent.tender_organization_id.in_(organization_ids)))
+
+
+def root_events(entity: str, root_ids) -> tuple:
+    return ChangeEvent.entity == entity, ChangeEvent.root_id.in_(root_ids)
+
+
+def tender_bid_events(tender_id: UUID) -> tuple:
+    return ChangeEvent.entity == BID, ChangeEvent.tender_id == tender_id
+
+
+def event_values(entity: str, action: str, row, previous_status: Optional[str] = None,
+                 tender_organization_id: Optional[UUID] = None, **values) -> dict:
+    # row — ORM-объект или строка RETURNING тендера либо предложения
+    is_tender = entity == TENDER
+    result = {
+        "entity": entity,
+        "action": action,
+        "entity_id": row.id,
+        "root_id": row.tender_root_id if is_tender else row.bid_root_id,
+        "version": row.version,
+        "status": row.status,
+        "previous_status": previous_status,
+        "tender_id": row.id if is_tender else row.tender_id,
+        "organization_id": row.organization_id,
+        "tender_organization_id": row.organization_id if is_tender else tender_organization_id
+    }
+    result.update(values)
+    return result
+
+
+async def record_events(db: AsyncSession, events: list):
+    # Журнал пишется в транзакции изменения: событие фиксируется или откатывается вместе с ним
+    if events:
+        await db.execute(insert(ChangeEvent), events)
+
+
+async def record_event(db: AsyncSession, entity: str, action: str, row, previous_status: Optional[str] = None,
+                       tender_organization_id: Optional[UUID] = None, **values):
+    # Новая строка получает id при сбросе сессии
+    await db.flush()
+    await record_events(db, [event_values(entity, action, row, previous_status, tender_organization_id, **values)])
+
+
+def encode_position(position: tuple) -> str:
+    return f"{position[0]}.{position[1]}"
+
+
+def decode_position(cursor: str) -> tuple:
+    try:
+        txid, event_id = cursor.split(".")
+        return int(txid), int(event_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class FeedEvent(NamedTuple):
+    position: tuple
+    name: str
+    body: bytes
+    entity: str
+    status: str
+    previous_status: Optional[str]
+    tender_id: UUID
+    organization_id: UUID
+    tender_organization_id: UUID
+
+    @property
+    def cursor(self) -> str:
+        return encode_position(self.position)
+
+    @classmethod
+    def from_row(cls, row) -> "FeedEvent":
+        # JSON события кодируется один раз и раздается всем клиентам как есть
+        position = (row.txid, row.id)
+        body = event_adapter.dump_json(event_adapter.validate_python({**row._mapping, "id": encode_position(position)}))
+        return cls(position, f"{row.entity}.{row.action}", body, row.entity, row.status, row.previous_status,
+                   row.tender_id, row.organization_id, row.tender_organization_id)
+
+    def visible_to(self, organization_ids: tuple, tender_id: Optional[UUID] = None) -> bool:
+        # Те же правила, что у списков, до или после изменения: опубликованный тендер виден всем, предложение —
+        # своей организации и, если опубликовано, организации тендера
+        if tender_id is not None and self.tender_id != tender_id:
+            return False
+        published = "PUBLISHED" in (self.status, self.previous_status)
+        if self.entity == TENDER:
+            return published or self.organization_id in organization_ids
+        return self.organization_id in organization_ids or (
+            published and self.tender_organization_id in organization_ids)
+
+
+class ChangeFeed:
+    # Одна выборка из журнала на воркер раздается всем подключенным клиентам: по уведомлению change_events
+    # новые события читаются в буфер последних событий, а клиенты фильтруют его по своей видимости.
+    # Позиция события — (txid, id); читаются только события транзакций, завершившихся раньше всех выполняющихся
+    def __init__(self, buffer_size: int, batch_size: int, poll_interval: float, retention: float):
+        self.buffer_size = max(buffer_size, 1)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._events = deque()
+        # Буфер содержит все события после _floor; _position — последнее прочитанное событие
+        self._floor = None
+        self._position = None
+        self._notified = None
+        self._wakeup = None
+        self._task = None
+        self._cleaned_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def notify(self, *args):
+        if self._notified is not None:
+            self._notified.set()
+
+    def _wake(self):
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    def _append(self, event: FeedEvent):
+        if len(self._events) >= self.buffer_size:
+            self._floor = self._events.popleft().position
+        self._events.append(event)
+        self._position = event.position
+
+    def _events_query(self, position: tuple):
+        return (
+            select(*ChangeEvent.__table__.columns, HORIZON.label("horizon"))
+            .where(POSITION > tuple_(*position))
+            .order_by(ChangeEvent.txid, ChangeEvent.id)
+            .limit(self.batch_size)
+        )
+
+    async def _poll(self) -> bool:
+        # True — в журнале остались события транзакций, перед которыми еще выполняется более ранняя
+        async with SessionLocal() as db:
+            if self._position is None:
+                self._position = self._floor = (await db.scalar(select(HORIZON)), 0)
+            while True:
+                rows = (await db.execute(self._events_query(self._position))).all()
+                ready = [row for row in rows if row.txid < row.horizon]
+                for row in ready:
+                    self._append(FeedEvent.from_row(row))
+                if ready:
+                    self._wake()
+                if len(ready) < len(rows):
+                    return True
+                if len(rows) < self.batch_size:
+                    return False
+
+    async def _cleanup(self):
+        if self.retention <= 0 or time.monotonic() - self._cleaned_at < CLEANUP_INTERVAL:
+            return
+        self._cleaned_at = time.monotonic()
+        async with SessionLocal() as db:
+            await db.execute(
+                delete(ChangeEvent).where(ChangeEvent.created_at < func.now() - timedelta(seconds=self.retention))
+            )
+            await db.commit()
+
+    async def _run(self):
+        retry_delay = PENDING_RETRY_DELAY
+        while True:
+            self._notified.clear()
+            try:
+                pending = await self._poll()
+                await self._cleanup()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Change feed error: {e}")
+                pending = False
+
+            if pending:
+                delay, retry_delay = retry_delay, min(retry_delay * 2, self.poll_interval)
+            else:
+                delay, retry_delay = self.poll_interval, PENDING_RETRY_DELAY
+            try:
+                await asyncio.wait_for(self._notified.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._notified = asyncio.Event()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            # Ожидающие клиенты получают пустой ответ и закрывают потоки
+            self._wake()
+
+    async def head(self) -> tuple:
+        # Позиция для клиента без курсора: события, прочитанные воркером до подключения, не отдаются
+        if self._position is not None:
+            return self._position
+        async with SessionLocal() as db:
+            return await db.scalar(select(HORIZON)), 0
+
+    async def read(self, position: tuple, organization_ids: tuple, tender_id: Optional[UUID] = None):
+        # Видимые события после position и позиция для продолжения; курсор старше буфера читается из журнала
+        if self._floor is not None and position >= self._floor:
+            events = []
+            for event in reversed(self._events):
+                if event.position <= position:
+                    break
+                events.append(event)
+            events.reverse()
+            next_position = max(position, self._position)
+        else:
+            async with SessionLocal() as db:
+                rows = (await db.execute(
+                    self._events_query(position).where(ChangeEvent.txid < HORIZON)
+                )).all()
+            events = [FeedEvent.from_row(row) for row in rows]
+            next_position = events[-1].position if events else position
+            if len(rows) < self.batch_size and self._floor is not None:
+                # Журнал прочитан до границы: все события до _floor уже получены
+                next_position = max(next_position, self._floor)
+        return [event for event in events if event.visible_to(organization_ids, tender_id)], next_position
+
+    async def wait(self, position: tuple, organization_ids: tuple, tender_id: Optional[UUID] = None,
+                   timeout: float = 0):
+        # Long-poll: возвращает, как только появятся видимые события, или пустой список по истечении timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            wakeup = self._wakeup
+            events, position = await self.read(position, organization_ids, tender_id)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0 or not self.running:
+                return events, position
+            try:
+                await asyncio.wait_for(wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+
+change_feed = ChangeFeed(EVENTS_BUFFER_SIZE, EVENTS_BATCH_SIZE, EVENTS_POLL_INTERVAL, EVENTS_RETENTION)
+
+listener.subscribe(CHANGE_EVENTS_CHANNEL, change_feed.notify)
+listener.on_reconnect(change_feed.notify)
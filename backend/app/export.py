@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import Select
+
+from backend.app.config import EXPORT_BATCH_SIZE
+from backend.app.database import SessionLocal
+from backend.app.projections import with_decisions
+from backend.app.serialization import list_adapter, partial_model
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+
+
+def check_export_format(export_format: str):
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=422,
+                            detail=f"Unsupported format. Allowed formats: {', '.join(EXPORT_FORMATS)}")
+
+
+def csv_value(value):
+    # Вложенные списки (решения по предложению) записываются в ячейку как JSON
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+async def export_rows(query: Select, model, fields: tuple, export_format: str, session_factory=SessionLocal):
+    # Серверный курсор: строки читаются пачками по EXPORT_BATCH_SIZE, в памяти одна пачка.
+    # Своя сессия — поток выполняется уже после выхода из обработчика
+    if fields != tuple(model.model_fields):
+        model = partial_model(model, fields)
+    adapter = list_adapter(model)
+    item_adapter = TypeAdapter(model)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(fields)
+        yield buffer.getvalue().encode()
+
+    async with session_factory() as db:
+        try:
+            result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for rows in result.partitions():
+                if "decisions" in fields:
+                    rows = await with_decisions(db, rows)
+                items = adapter.validate_python(rows, from_attributes=True)
+                if export_format == "ndjson":
+                    yield b"".join(item_adapter.dump_json(item) + b"\n" for item in items)
+                else:
+                    buffer.seek(0)
+                    buffer.truncate()
+                    for item in adapter.dump_python(items, mode="json"):
+                        writer.writerow([csv_value(item[field]) for field in fields])
+                    yield buffer.getvalue().encode()
+        except Exception as e:
+            # Заголовки уже отправлены: ответ обрывается, клиент получает неполный файл
+            print(f"Export error: {e}")
+            raise
+
+
+def export_response(query: Select, model, fields: tuple, export_format: str, name: str,
+                    session_factory=SessionLocal) -> StreamingResponse:
+    return StreamingResponse(
+        export_rows(query, model, fields, export_format, session_factory),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
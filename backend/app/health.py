@@ -0,0 +1,103 @@
+import asyncio
+import functools
+import os
+import signal
+import threading
+import time
+
+from sqlalchemy import text
+
+from backend.app.config import HEALTH_CHECK_TIMEOUT
+from backend.app.database import engine, replica_engine
+from backend.app.events import change_feed
+from backend.app.pool import pool_status
+
+DRAIN_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+async def ping_engine(target):
+    async with target.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def check_engine(target) -> dict:
+    # Соединение берется из пула воркера: исчерпанный пул, как и недоступная база, делает воркер неготовым
+    started = time.perf_counter()
+    error = None
+    try:
+        await asyncio.wait_for(ping_engine(target), HEALTH_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        error = f"No database connection within {HEALTH_CHECK_TIMEOUT} s"
+    except Exception as e:
+        error = str(e)
+    return {
+        "status": "ok" if error is None else "unavailable",
+        "latency_ms": (time.perf_counter() - started) * 1000,
+        "error": error,
+        "pool": pool_status(target.pool)
+    }
+
+
+class Lifecycle:
+    # Состояние воркера для проверок живости и готовности. По сигналу остановки воркер сразу перестает быть
+    # готовым и закрывает потоки ленты изменений: сервер дожидается только обычных запросов
+    def __init__(self):
+        self.started = False
+        self.draining = False
+        self._previous_handlers = {}
+        self._drain_task = None
+
+    def start(self):
+        self.started = True
+        self.draining = False
+        self._install_signal_handlers()
+
+    def stop(self):
+        self.draining = True
+        for sig, handler in self._previous_handlers.items():
+            signal.signal(sig, handler)
+        self._previous_handlers = {}
+
+    def drain(self):
+        if not self.draining:
+            self.draining = True
+            self._drain_task = asyncio.get_running_loop().create_task(change_feed.stop())
+
+    def _install_signal_handlers(self):
+        # Обработчики сервера (uvicorn) установлены до старта приложения и вызываются после начала дренажа
+        if threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        for sig in DRAIN_SIGNALS:
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+            self._previous_handlers[sig] = previous
+            signal.signal(sig, functools.partial(self._handle_signal, loop, previous))
+
+    def _handle_signal(self, loop, previous, sig, frame):
+        loop.call_soon_threadsafe(self.drain)
+        previous(sig, frame)
+
+    def liveness(self) -> dict:
+        # Живость не зависит от базы: перезапуск воркера не поможет при ее недоступности
+        return {"status": "ok", "pid": os.getpid(), "draining": self.draining}
+
+    async def readiness(self) -> dict:
+        result = self.liveness()
+        if not self.started or self.draining:
+            result["status"] = "unavailable"
+            return result
+        checks = [check_engine(engine)]
+        if replica_engine is not None:
+            checks.append(check_engine(replica_engine))
+        databases = await asyncio.gather(*checks)
+        result["database"] = databases[0]
+        if replica_engine is not None:
+            result["replica"] = databases[1]
+        if any(database["status"] != "ok" for database in databases):
+            result["status"] = "unavailable"
+        return result
+
+
+lifecycle = Lifecycle()
@@ -0,0 +1,158 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from backend.app.models import Bid, Tender
+from backend.app.models.bid import BidDecision, BidHistory
+from backend.app.models.tender import TenderHistory
+from backend.app.queries import update_current
+
+# JSONB хранит UUID, суммы и даты строками; при восстановлении версии значения приводятся к типу столбца
+DECODERS = {UUID: UUID, Decimal: Decimal, datetime: datetime.fromisoformat}
+
+
+def encode_value(value):
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class VersionHistory:
+    # Версии сущности с общим root_id. Прежняя версия — либо отдельная строка (VERSION_STORAGE=rows), либо
+    # обратная дельта в таблице истории (VERSION_STORAGE=delta): значения полей версии N, отличающиеся от N + 1.
+    # Версия N восстанавливается от ближайшей строки выше нее последовательным применением дельт.
+    # in_place — поля, которые меняются без новой версии (статус, кворум): они входят в каждую дельту,
+    # иначе восстановленная версия получила бы их текущее значение
+    def __init__(self, model, history_model, root_field: str, fields: tuple, in_place: tuple):
+        self.model = model
+        self.history_model = history_model
+        self.root_field = root_field
+        self.fields = fields
+        self.in_place = in_place
+
+    def snapshot(self, row) -> dict:
+        # Вычисляемые базой столбцы (search_vector) в версию не входят
+        return {column.key: getattr(row, column.key) for column in self.model.__table__.columns
+                if column.computed is None}
+
+    def decode(self, changes: dict) -> dict:
+        values = {}
+        for field, value in changes.items():
+            decoder = DECODERS.get(self.model.__table__.c[field].type.python_type)
+            values[field] = decoder(value) if decoder and value is not None else value
+        return values
+
+    async def _rows(self, db: AsyncSession, root_id: UUID, *conditions, limit: Optional[int] = None) -> dict:
+        query = (
+            select(self.model)
+            .where(getattr(self.model, self.root_field) == root_id, *conditions)
+            .order_by(self.model.version.desc())
+            .limit(limit)
+        )
+        return {row.version: row for row in await db.scalars(query)}
+
+    async def _deltas(self, db: AsyncSession, root_id: UUID, *conditions, limit: Optional[int] = None) -> dict:
+        query = (
+            select(self.history_model.version, self.history_model.changes)
+            .where(getattr(self.history_model, self.root_field) == root_id, *conditions)
+            .order_by(self.history_model.version.desc())
+            .limit(limit)
+        )
+        return dict((await db.execute(query)).all())
+
+    async def _row_above(self, db: AsyncSession, root_id: UUID, version: int):
+        # Ближайшая версия выше version, сохраненная строкой (в крайнем случае — текущая)
+        return await db.scalar(
+            select(self.model)
+            .where(getattr(self.model, self.root_field) == root_id, self.model.version > version)
+            .order_by(self.model.version)
+            .limit(1)
+        )
+
+    def _rebuild(self, base, rows: dict, deltas: dict, lowest: int) -> list:
+        # Версии от строки base вниз до lowest: сохраненные строкой берутся как есть, остальные — наложением дельт
+        state = self.snapshot(base)
+        versions = [state]
+        for version in range(base.version - 1, lowest - 1, -1):
+            if version in rows:
+                state = self.snapshot(rows[version])
+            elif version in deltas:
+                state = {**state, **self.decode(deltas[version]), "version": version}
+            else:
+                break
+            versions.append(state)
+        return versions
+
+    async def versions(self, db: AsyncSession, root_id: UUID, before: Optional[int] = None,
+                       limit: Optional[int] = None) -> list:
+        # Версии от новых к старым с номером меньше before, не больше limit. Строки и дельты страницы выбираются
+        # по (root_id, version) с LIMIT; дельты над верхней версией страницы дочитываются до ближайшей строки
+        row_conditions = [] if before is None else [self.model.version < before]
+        delta_conditions = [] if before is None else [self.history_model.version < before]
+        rows = await self._rows(db, root_id, *row_conditions, limit=limit)
+        deltas = await self._deltas(db, root_id, *delta_conditions, limit=limit)
+        page = sorted({*rows, *deltas}, reverse=True)[:limit]
+        if not page:
+            return []
+
+        top = page[0]
+        base = rows.get(top)
+        if base is None:
+            base = await self._row_above(db, root_id, top)
+            if base is None:
+                return []
+            deltas.update(await self._deltas(db, root_id, self.history_model.version > top,
+                                             self.history_model.version < base.version))
+        return [state for state in self._rebuild(base, rows, deltas, page[-1]) if state["version"] <= top]
+
+    async def version(self, db: AsyncSession, root_id: UUID, version: int) -> Optional[dict]:
+        # Версия, сохраненная строкой, читается одной выборкой по (root_id, version); иначе восстанавливается
+        # от ближайшей строки выше нее по дельтам между ними
+        rows = await self._rows(db, root_id, self.model.version == version)
+        if version in rows:
+            return self.snapshot(rows[version])
+        base = await self._row_above(db, root_id, version)
+        if base is None:
+            return None
+        deltas = await self._deltas(db, root_id, self.history_model.version >= version,
+                                    self.history_model.version < base.version)
+        state = self._rebuild(base, {}, deltas, version)[-1]
+        return state if state["version"] == version else None
+
+    async def apply(self, db: AsyncSession, head, values: dict):
+        # Новая версия на месте текущей строки (id не меняется), прежние значения измененных полей — в историю.
+        # updated_at выставляет onupdate и поэтому всегда попадает в дельту. None — строку успели изменить
+        previous = self.snapshot(head)
+        updated = await update_current(db, self.model, head, **values, version=head.version + 1)
+        if updated is None:
+            return None
+        changes = {field: encode_value(previous[field]) for field in self.fields
+                   if field in self.in_place or field not in values or values[field] != previous[field]}
+        db.add(self.history_model(**{self.root_field: previous[self.root_field]},
+                                  version=previous["version"], changes=changes))
+        return updated
+
+
+class BidVersionHistory(VersionHistory):
+    # Новая версия предложения начинается без решений и одобрений, как новая строка в режиме rows: голоса,
+    # отданные прежней версии, не учитываются в кворуме новой, и ответственный может проголосовать снова
+    async def apply(self, db: AsyncSession, head, values: dict):
+        updated = await super().apply(db, head, {**values, "approvals": 0})
+        if updated is not None:
+            await db.execute(delete(BidDecision).where(BidDecision.bid_id == updated.id))
+            set_committed_value(updated, "decisions", [])
+        return updated
+
+
+tender_history = VersionHistory(Tender, TenderHistory, "tender_root_id",
+                                ("title", "description", "status", "service_type", "updated_at"), ("status",))
+bid_history = BidVersionHistory(Bid, BidHistory, "bid_root_id",
+                                ("title", "description", "amount", "status", "tender_id", "quorum", "updated_at"),
+                                ("status", "quorum"))
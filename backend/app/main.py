@@ -2,23 +2,62 @@ from fastapi import FastAPI
 import uvicorn
 from starlette.responses import PlainTextResponse
 
-from backend.app.config import host, port
-from backend.app.database import init_db
+from backend.app.admission import AdmissionMiddleware
+from backend.app.config import host, port, RUN_MIGRATIONS, DB_POOL_WARMUP
+from backend.app.database import dispose_engines, init_db, reset_pools, warm_up_pool
+from backend.app.events import change_feed
+from backend.app.health import lifecycle
+from backend.app.metrics import MetricsMiddleware, route_metrics
+from backend.app.notifications import listener
+from backend.app.replica import ConsistencyTokenMiddleware
 from backend.app.routes import api_router
 
-app = FastAPI()
-app.include_router(api_router)
 
+async def startup_event():
+    await reset_pools()
+    if RUN_MIGRATIONS:
+        await init_db()
+    if DB_POOL_WARMUP:
+        await warm_up_pool(DB_POOL_WARMUP)
+    listener.start()
+    change_feed.start()
+    lifecycle.start()
 
-@app.on_event("startup")
-def startup_event():
-    init_db()
+
+async def shutdown_event():
+    # Сервер уже дождался текущих запросов; фоновые задачи останавливаются, соединения пула закрываются
+    lifecycle.stop()
+    await change_feed.stop()
+    await listener.stop()
+    await dispose_engines()
 
 
-@app.get("/api/ping", response_class=PlainTextResponse)
 async def ping():
     return "ok"
 
 
+async def metrics():
+    return route_metrics.render()
+
+
+def create_app() -> FastAPI:
+    # Фабрика приложения: каждый воркер (python -m backend.app.server) собирает приложение в своем процессе
+    application = FastAPI()
+    application.include_router(api_router)
+    # Допуск — внутри метрик: отказы 429/503 попадают в http_requests_total
+    application.add_middleware(AdmissionMiddleware)
+    application.add_middleware(MetricsMiddleware)
+    application.add_middleware(ConsistencyTokenMiddleware)
+    application.on_event("startup")(startup_event)
+    application.on_event("shutdown")(shutdown_event)
+    application.get("/api/ping", response_class=PlainTextResponse)(ping)
+    application.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)(metrics)
+    return application
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
-    uvicorn.run(app, host=host, port=int(port), reload=True)
+    # Режим разработки: один процесс с перезагрузкой при изменении кода
+    uvicorn.run("backend.app.main:create_app", factory=True, host=host, port=int(port), reload=True)
@@ -0,0 +1,221 @@
+import functools
+import inspect
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.app.config import METRICS_ENABLED, METRICS_SAMPLE_RATE, METRICS_SERVER_TIMING
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 89)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestTiming:
+    __slots__ = ("started", "queries", "db_time", "handler_started", "handler_finished")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.handler_started = None
+        self.handler_finished = None
+
+    @property
+    def handler_time(self) -> float:
+        if self.handler_started is None or self.handler_finished is None:
+            return 0.0
+        return self.handler_finished - self.handler_started
+
+
+# Замеры текущего запроса; None, если запрос не попал в выборку
+current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("current_timing", default=None)
+# ASGI scope текущего запроса: маршрут и обработчик для журнала медленных запросов
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def render(self, name: str, labels: str):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+HISTOGRAMS = (
+    ("http_request_duration_seconds", "Время обработки запроса до отправки заголовков ответа", DURATION_BUCKETS),
+    ("http_request_handler_seconds", "Время выполнения обработчика маршрута", DURATION_BUCKETS),
+    ("http_request_serialize_seconds", "Время валидации и сериализации ответа", DURATION_BUCKETS),
+    ("http_request_db_seconds", "Суммарное время SQL-запросов", DURATION_BUCKETS),
+    ("http_request_db_queries", "Число SQL-запросов на запрос", QUERY_BUCKETS),
+)
+
+
+class RouteMetrics:
+    # Метрики одного процесса; каждый воркер отдает свои (см. метку pid)
+    def __init__(self):
+        self.requests = {}
+        self.histograms = {}
+
+    def count(self, method: str, route: str, status: int):
+        key = (method, route, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def observe(self, method: str, route: str, timing: RequestTiming, finished: float):
+        histograms = self.histograms.get((method, route))
+        if histograms is None:
+            histograms = self.histograms[(method, route)] = [Histogram(buckets) for _, _, buckets in HISTOGRAMS]
+        handler_time = timing.handler_time
+        serialize_time = finished - timing.handler_finished if timing.handler_finished else 0.0
+        values = (finished - timing.started, handler_time, serialize_time, timing.db_time, timing.queries)
+        for histogram, value in zip(histograms, values):
+            histogram.observe(value)
+
+    def render(self) -> str:
+        pid = os.getpid()
+        lines = [
+            "# HELP http_requests_total Число обработанных запросов",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f'http_requests_total{{pid="{pid}",method="{method}",route="{route}",'
+                         f'status="{status}"}} {count}')
+        for index, (name, description, _) in enumerate(HISTOGRAMS):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), histograms in sorted(self.histograms.items()):
+                labels = f'pid="{pid}",method="{method}",route="{route}"'
+                lines.extend(histograms[index].render(name, labels))
+        return "\n".join(lines) + "\n"
+
+
+route_metrics = RouteMetrics()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timing.get() is not None:
+        context.query_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = current_timing.get()
+    started = getattr(context, "query_started", None)
+    if timing is not None and started is not None:
+        timing.queries += 1
+        timing.db_time += time.perf_counter() - started
+
+
+def instrument_engine(engine: Engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def timed_endpoint(endpoint):
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        timing = current_timing.get()
+        if timing is None:
+            return await endpoint(*args, **kwargs)
+        timing.handler_started = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timing.handler_finished = time.perf_counter()
+
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    # Отделяет время обработчика от валидации и сериализации ответа
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+
+def route_template(scope: dict) -> str:
+    # Новые версии FastAPI подключают роутеры без копирования маршрутов:
+    # полный шаблон пути (с префиксом) лежит в effective_route_context
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    route = scope.get("route")
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+
+def server_timing(timing: RequestTiming, finished: float) -> str:
+    parts = [
+        f'db;dur={timing.db_time * 1000:.2f};desc="{timing.queries} queries"',
+        f"handler;dur={timing.handler_time * 1000:.2f}",
+    ]
+    if timing.handler_finished:
+        parts.append(f"serialize;dur={(finished - timing.handler_finished) * 1000:.2f}")
+    parts.append(f"total;dur={(finished - timing.started) * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        scope_token = current_scope.set(scope)
+        if not METRICS_ENABLED:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                current_scope.reset(scope_token)
+            return
+
+        timing = RequestTiming() if random.random() < METRICS_SAMPLE_RATE else None
+        token = current_timing.set(timing)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                route = route_template(scope)
+                route_metrics.count(scope["method"], route, message["status"])
+                if timing is not None:
+                    finished = time.perf_counter()
+                    route_metrics.observe(scope["method"], route, timing, finished)
+                    if METRICS_SERVER_TIMING:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (b"server-timing", server_timing(timing, finished).encode())
+                        ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_timing.reset(token)
+            current_scope.reset(scope_token)
@@ -0,0 +1,65 @@
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "versions")
+MIGRATION_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# Ключ pg_advisory_xact_lock: несколько воркеров не применяют миграции одновременно
+MIGRATION_LOCK_KEY = 842_001
+
+
+def load_migrations():
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding="utf-8") as f:
+            migrations.append((int(match.group(1)), match.group(2), f.read()))
+    return migrations
+
+
+def split_statements(sql: str):
+    statements = []
+    current = []
+    in_dollar_quote = False
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not current and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+        if line.count("$$") % 2:
+            in_dollar_quote = not in_dollar_quote
+        if not in_dollar_quote and stripped.endswith(";"):
+            statements.append("\n".join(current))
+            current = []
+    if current:
+        statements.append("\n".join(current))
+    return statements
+
+
+def apply_migrations(connection: Connection):
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INT PRIMARY KEY,"
+        " name VARCHAR(255) NOT NULL,"
+        " applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    applied = set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+    newly_applied = []
+    for version, name, sql in load_migrations():
+        if version in applied:
+            continue
+        for statement in split_statements(sql):
+            connection.exec_driver_sql(statement)
+        connection.execute(
+            text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+            {"version": version, "name": name}
+        )
+        newly_applied.append(f"{version:04d}_{name}")
+    return newly_applied
@@ -0,0 +1,14 @@
+import asyncio
+
+from backend.app.database import engine, init_db
+
+
+async def main():
+    try:
+        await init_db()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
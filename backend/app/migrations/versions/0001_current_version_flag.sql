@@ -0,0 +1,32 @@
+-- Признак текущей версии для баз, созданных до появления is_current в init.sql
+ALTER TABLE tender ADD COLUMN IF NOT EXISTS is_current BOOLEAN NOT NULL DEFAULT TRUE;
+ALTER TABLE bid ADD COLUMN IF NOT EXISTS is_current BOOLEAN NOT NULL DEFAULT TRUE;
+
+-- Параллельные правки могли создать две строки с одной версией: версии таких тендеров и предложений
+-- перенумеровываются по порядку создания, иначе обе строки последней версии стали бы текущими
+UPDATE tender t
+SET version = renumbered.version
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY tender_root_id ORDER BY version, created_at, id) AS version
+    FROM tender
+    WHERE tender_root_id IN (SELECT tender_root_id FROM tender GROUP BY tender_root_id, version HAVING count(*) > 1)
+) renumbered
+WHERE t.id = renumbered.id AND t.version <> renumbered.version;
+
+UPDATE bid b
+SET version = renumbered.version
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY bid_root_id ORDER BY version, created_at, id) AS version
+    FROM bid
+    WHERE bid_root_id IN (SELECT bid_root_id FROM bid GROUP BY bid_root_id, version HAVING count(*) > 1)
+) renumbered
+WHERE b.id = renumbered.id AND b.version <> renumbered.version;
+
+UPDATE tender t
+SET is_current = (t.version = (SELECT max(h.version) FROM tender h WHERE h.tender_root_id = t.tender_root_id));
+
+UPDATE bid b
+SET is_current = (b.version = (SELECT max(h.version) FROM bid h WHERE h.bid_root_id = b.bid_root_id));
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_tender_current_root ON tender (tender_root_id) WHERE is_current;
+CREATE UNIQUE INDEX IF NOT EXISTS ix_bid_current_root ON bid (bid_root_id) WHERE is_current;
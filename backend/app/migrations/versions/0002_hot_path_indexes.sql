@@ -0,0 +1,38 @@
+-- Одна строка на (root_id, version): параллельные правки не создадут дубликаты версий.
+-- Сначала перенумеровываем версии с дубликатами, созданными до индекса; текущая версия остается последней
+UPDATE tender t
+SET version = renumbered.version
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY tender_root_id ORDER BY version, is_current, created_at, id) AS version
+    FROM tender
+    WHERE tender_root_id IN (SELECT tender_root_id FROM tender GROUP BY tender_root_id, version HAVING count(*) > 1)
+) renumbered
+WHERE t.id = renumbered.id AND t.version <> renumbered.version;
+
+UPDATE bid b
+SET version = renumbered.version
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY bid_root_id ORDER BY version, is_current, created_at, id) AS version
+    FROM bid
+    WHERE bid_root_id IN (SELECT bid_root_id FROM bid GROUP BY bid_root_id, version HAVING count(*) > 1)
+) renumbered
+WHERE b.id = renumbered.id AND b.version <> renumbered.version;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_tender_root_version ON tender (tender_root_id, version);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_bid_root_version ON bid (bid_root_id, version);
+
+-- Проверка ответственности: по пользователю (user_id, organization_id) и подсчет кворума по организации
+CREATE INDEX IF NOT EXISTS ix_organization_responsible_user_org ON organization_responsible (user_id, organization_id);
+CREATE INDEX IF NOT EXISTS ix_organization_responsible_org ON organization_responsible (organization_id);
+
+-- Списки тендеров: публичная выборка по статусу/типу и выборка по организации
+CREATE INDEX IF NOT EXISTS ix_tender_current_status_service ON tender (status, service_type) WHERE is_current;
+CREATE INDEX IF NOT EXISTS ix_tender_current_organization ON tender (organization_id) WHERE is_current;
+
+-- Списки предложений: по тендеру и статусу, по организации, по автору
+CREATE INDEX IF NOT EXISTS ix_bid_current_tender_status ON bid (tender_id, status) WHERE is_current;
+CREATE INDEX IF NOT EXISTS ix_bid_current_organization ON bid (organization_id) WHERE is_current;
+CREATE INDEX IF NOT EXISTS ix_bid_creator_tender ON bid (creator_id, tender_id);
+
+CREATE INDEX IF NOT EXISTS ix_bid_decision_bid_user ON bid_decision (bid_id, user_id);
+CREATE INDEX IF NOT EXISTS ix_review_bid ON review (bid_id);
@@ -0,0 +1,3 @@
+-- Keyset-пагинация списков по (created_at, id) среди текущих версий
+CREATE INDEX IF NOT EXISTS ix_tender_current_created ON tender (created_at, id) WHERE is_current;
+CREATE INDEX IF NOT EXISTS ix_bid_current_created ON bid (created_at, id) WHERE is_current;
@@ -0,0 +1,17 @@
+-- Уведомление для сброса кэша пользователей и их организаций в воркерах приложения
+CREATE OR REPLACE FUNCTION notify_identity_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('identity_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS organization_responsible_identity_changed ON organization_responsible;
+CREATE TRIGGER organization_responsible_identity_changed
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON organization_responsible
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_identity_changed();
+
+DROP TRIGGER IF EXISTS employee_identity_changed ON employee;
+CREATE TRIGGER employee_identity_changed
+    AFTER UPDATE OR DELETE OR TRUNCATE ON employee
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_identity_changed();
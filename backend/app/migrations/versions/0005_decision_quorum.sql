@@ -0,0 +1,32 @@
+-- Одно решение на пользователя: сначала убираем возможные дубликаты, оставляя самое раннее
+DELETE FROM bid_decision d
+USING bid_decision earlier
+WHERE d.bid_id = earlier.bid_id
+  AND d.user_id = earlier.user_id
+  AND (d.decision_date, d.id) > (earlier.decision_date, earlier.id);
+
+DROP INDEX IF EXISTS ix_bid_decision_bid_user;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_bid_decision_bid_user ON bid_decision (bid_id, user_id);
+
+-- Счетчик одобрений, обновляемый вместе с записью решения
+ALTER TABLE bid ADD COLUMN IF NOT EXISTS approvals INT NOT NULL DEFAULT 0;
+
+UPDATE bid
+SET approvals = counts.approvals
+FROM (
+    SELECT bid_id, count(*) AS approvals
+    FROM bid_decision
+    WHERE decision = 'APPROVED'
+    GROUP BY bid_id
+) counts
+WHERE bid.id = counts.bid_id;
+
+-- Кворум фиксируется при публикации; для уже опубликованных предложений вычисляем его сейчас
+UPDATE bid
+SET quorum = LEAST(3, (
+    SELECT count(*)
+    FROM organization_responsible r
+    JOIN tender t ON t.organization_id = r.organization_id
+    WHERE t.id = bid.tender_id
+))
+WHERE quorum IS NULL AND status <> 'CREATED';
@@ -0,0 +1,12 @@
+-- Уведомление для сброса кэша анонимного списка тендеров в остальных воркерах приложения
+CREATE OR REPLACE FUNCTION notify_tenders_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('tenders_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tender_tenders_changed ON tender;
+CREATE TRIGGER tender_tenders_changed
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tender
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_tenders_changed();
@@ -0,0 +1,16 @@
+-- Прежние версии в режиме VERSION_STORAGE=delta: значения полей версии, отличающиеся от следующей версии
+CREATE TABLE IF NOT EXISTS tender_history (
+    tender_root_id UUID NOT NULL,
+    version INT NOT NULL,
+    changes JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (tender_root_id, version)
+);
+
+CREATE TABLE IF NOT EXISTS bid_history (
+    bid_root_id UUID NOT NULL,
+    version INT NOT NULL,
+    changes JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (bid_root_id, version)
+);
@@ -0,0 +1,13 @@
+-- Полнотекстовый поиск (параметр q): вектор названия и описания поддерживается базой при любой вставке и правке
+ALTER TABLE tender ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+) STORED;
+
+ALTER TABLE bid ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_tender_current_search ON tender USING GIN (search_vector) WHERE is_current;
+CREATE INDEX IF NOT EXISTS ix_bid_current_search ON bid USING GIN (search_vector) WHERE is_current;
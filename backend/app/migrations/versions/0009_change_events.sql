@@ -0,0 +1,34 @@
+-- Журнал изменений тендеров и предложений (outbox) для ленты /api/events.
+-- txid — транзакция, записавшая событие: лента отдает события в порядке (txid, id) и только транзакций,
+-- завершившихся раньше всех еще выполняющихся, поэтому поздно зафиксированное событие не окажется позади курсора
+CREATE TABLE IF NOT EXISTS change_event (
+    id BIGSERIAL PRIMARY KEY,
+    txid BIGINT NOT NULL DEFAULT txid_current(),
+    entity VARCHAR(16) NOT NULL,
+    action VARCHAR(16) NOT NULL,
+    entity_id UUID NOT NULL,
+    root_id UUID NOT NULL,
+    version INT NOT NULL,
+    status VARCHAR(16) NOT NULL,
+    previous_status VARCHAR(16),
+    tender_id UUID NOT NULL,
+    organization_id UUID NOT NULL,
+    tender_organization_id UUID NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_change_event_position ON change_event (txid, id);
+CREATE INDEX IF NOT EXISTS ix_change_event_created ON change_event (created_at);
+
+-- Одно уведомление на оператор; уведомления одной транзакции доставляются после фиксации и схлопываются
+CREATE OR REPLACE FUNCTION notify_change_events() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('change_events', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS change_event_notify ON change_event;
+CREATE TRIGGER change_event_notify
+    AFTER INSERT ON change_event
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_change_events();
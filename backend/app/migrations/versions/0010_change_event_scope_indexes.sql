@@ -0,0 +1,4 @@
+-- ETag списков — последнее событие журнала в области списка (etags.list_etag): предложения тендера и
+-- предложения пользователя ищутся по своему индексу, а не обратным проходом по всему журналу
+CREATE INDEX IF NOT EXISTS ix_change_event_tender ON change_event (tender_id, txid, id);
+CREATE INDEX IF NOT EXISTS ix_change_event_root ON change_event (root_id, txid, id);
@@ -1,3 +1,9 @@
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
+
+# Вектор полнотекстового поиска по названию (вес A) и описанию (вес B) тендеров и предложений
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
@@ -1,12 +1,27 @@
-from sqlalchemy import Column, TIMESTAMP, func, Enum, ForeignKey, Numeric, Integer, String
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlalchemy.orm import relationship
-from backend.app.models.base import Base
+from sqlalchemy import Column, Computed, TIMESTAMP, func, Enum, ForeignKey, Numeric, Integer, String, Boolean, Index, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID as PG_UUID
+from sqlalchemy.orm import deferred, relationship
+from backend.app.models.base import Base, SEARCH_VECTOR
 import uuid
 
 
 class Bid(Base):
     __tablename__ = 'bid'
+    __table_args__ = (
+        Index('ix_bid_current_root', 'bid_root_id', unique=True,
+              postgresql_where=text('is_current')),
+        Index('ux_bid_root_version', 'bid_root_id', 'version', unique=True),
+        Index('ix_bid_current_tender_status', 'tender_id', 'status',
+              postgresql_where=text('is_current')),
+        Index('ix_bid_current_organization', 'organization_id',
+              postgresql_where=text('is_current')),
+        Index('ix_bid_current_created', 'created_at', 'id',
+              postgresql_where=text('is_current')),
+        Index('ix_bid_current_search', 'search_vector', postgresql_using='gin',
+              postgresql_where=text('is_current')),
+        Index('ix_bid_creator_tender', 'creator_id', 'tender_id'),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     bid_root_id = Column(PG_UUID(as_uuid=True), nullable=False)
@@ -19,17 +34,33 @@ class Bid(Base):
     organization_id = Column(PG_UUID(as_uuid=True), ForeignKey('organization.id', ondelete='CASCADE'), nullable=False)
     creator_id = Column(PG_UUID(as_uuid=True), ForeignKey('employee.id', ondelete='CASCADE'), nullable=False)
     version = Column(Integer, default=1)
+    is_current = Column(Boolean, nullable=False, default=True)
     quorum = Column(Integer)
+    approvals = Column(Integer, nullable=False, default=0, server_default=text('0'))
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    # Вычисляется базой (см. миграцию 0008); в ответы не входит и по умолчанию не загружается
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR)))
 
     tender = relationship("Tender", back_populates="bids")
     decisions = relationship("BidDecision", back_populates="bid")
     reviews = relationship("Review", back_populates="bid")
 
 
+class BidHistory(Base):
+    __tablename__ = 'bid_history'
+
+    bid_root_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    changes = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
 class BidDecision(Base):
     __tablename__ = 'bid_decision'
+    __table_args__ = (
+        Index('ux_bid_decision_bid_user', 'bid_id', 'user_id', unique=True),
+    )
 
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     bid_id = Column(PG_UUID(as_uuid=True), ForeignKey('bid.id', ondelete='CASCADE'), nullable=False)
@@ -42,6 +73,10 @@ class BidDecision(Base):
 
 class Review(Base):
     __tablename__ = 'review'
+    __table_args__ = (
+        Index('ix_review_bid', 'bid_id'),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     bid_id = Column(PG_UUID(as_uuid=True), ForeignKey('bid.id', ondelete='CASCADE'), nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy import BigInteger, Column, Index, Integer, String, TIMESTAMP, func, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from backend.app.models.base import Base
+
+
+class ChangeEvent(Base):
+    __tablename__ = 'change_event'
+    __table_args__ = (
+        Index('ix_change_event_position', 'txid', 'id'),
+        Index('ix_change_event_created', 'created_at'),
+        Index('ix_change_event_tender', 'tender_id', 'txid', 'id'),
+        Index('ix_change_event_root', 'root_id', 'txid', 'id'),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    txid = Column(BigInteger, nullable=False, server_default=text('txid_current()'))
+    entity = Column(String(16), nullable=False)
+    action = Column(String(16), nullable=False)
+    entity_id = Column(PG_UUID(as_uuid=True), nullable=False)
+    root_id = Column(PG_UUID(as_uuid=True), nullable=False)
+    version = Column(Integer, nullable=False)
+    status = Column(String(16), nullable=False)
+    previous_status = Column(String(16))
+    tender_id = Column(PG_UUID(as_uuid=True), nullable=False)
+    organization_id = Column(PG_UUID(as_uuid=True), nullable=False)
+    tender_organization_id = Column(PG_UUID(as_uuid=True), nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
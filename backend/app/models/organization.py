@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Enum, TIMESTAMP, func, ForeignKey
+from sqlalchemy import Column, String, Text, Enum, TIMESTAMP, func, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import relationship
 from backend.app.models.base import Base
@@ -21,6 +21,10 @@ class Organization(Base):
 
 class OrganizationResponsible(Base):
     __tablename__ = 'organization_responsible'
+    __table_args__ = (
+        Index('ix_organization_responsible_user_org', 'user_id', 'organization_id'),
+        Index('ix_organization_responsible_org', 'organization_id'),
+    )
 
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     organization_id = Column(PG_UUID(as_uuid=True), ForeignKey('organization.id', ondelete='CASCADE'))
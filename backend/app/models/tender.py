@@ -1,24 +1,50 @@
-from sqlalchemy import Column, String, Enum, ForeignKey, TIMESTAMP, Integer, func
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlalchemy.orm import relationship
-from backend.app.models.base import Base
+from sqlalchemy import Column, Computed, String, Enum, ForeignKey, TIMESTAMP, Integer, Boolean, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID as PG_UUID
+from sqlalchemy.orm import deferred, relationship
+from backend.app.models.base import Base, SEARCH_VECTOR
 import uuid
 
 
 class Tender(Base):
     __tablename__ = 'tender'
+    __table_args__ = (
+        Index('ix_tender_current_root', 'tender_root_id', unique=True,
+              postgresql_where=text('is_current')),
+        Index('ux_tender_root_version', 'tender_root_id', 'version', unique=True),
+        Index('ix_tender_current_status_service', 'status', 'service_type',
+              postgresql_where=text('is_current')),
+        Index('ix_tender_current_organization', 'organization_id',
+              postgresql_where=text('is_current')),
+        Index('ix_tender_current_created', 'created_at', 'id',
+              postgresql_where=text('is_current')),
+        Index('ix_tender_current_search', 'search_vector', postgresql_using='gin',
+              postgresql_where=text('is_current')),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tender_root_id = Column(PG_UUID(as_uuid=True), nullable=False)
     title = Column(String(100), nullable=False)
     description = Column(String)
     status = Column(Enum("CREATED", "PUBLISHED", "CLOSED", name="tender_status"), default="CREATED")
-    service_type = Column(String(100), nullable=False)
+    service_type = Column(Enum("Construction", "IT Services", "Consulting", name="service_type_enum"), nullable=False)
     organization_id = Column(PG_UUID(as_uuid=True), ForeignKey('organization.id', ondelete='CASCADE'), nullable=False)
     creator_id = Column(PG_UUID(as_uuid=True), ForeignKey('employee.id', ondelete='CASCADE'), nullable=False)
     version = Column(Integer, default=1)
+    is_current = Column(Boolean, nullable=False, default=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    # Вычисляется базой (см. миграцию 0008); в ответы не входит и по умолчанию не загружается
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR)))
 
     organization = relationship("Organization", back_populates="tenders")
     bids = relationship("Bid", back_populates="tender")
+
+
+class TenderHistory(Base):
+    __tablename__ = 'tender_history'
+
+    tender_root_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    changes = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
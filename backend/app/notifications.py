@@ -0,0 +1,68 @@
+import asyncio
+from collections import defaultdict
+
+from backend.app.config import DATABASE_URL
+
+RECONNECT_DELAY = 1.0
+
+
+# Одно соединение LISTEN на воркер, раздающее уведомления подписчикам по каналам
+class PgListener:
+    def __init__(self, dsn: str):
+        self._dsn = dsn
+        self._handlers = defaultdict(list)
+        self._reconnect_handlers = []
+        self._task = None
+        self._connection = None
+
+    def subscribe(self, channel: str, handler):
+        self._handlers[channel].append(handler)
+
+    def on_reconnect(self, handler):
+        # Уведомления, пришедшие во время разрыва, потеряны — подписчики сбрасывают свое состояние
+        self._reconnect_handlers.append(handler)
+
+    def _dispatch(self, connection, pid, channel, payload):
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                print(f"Notification handler error on {channel}: {e}")
+
+    async def _listen(self):
+        import asyncpg
+
+        while True:
+            try:
+                self._connection = await asyncpg.connect(self._dsn)
+                closed = asyncio.Event()
+                self._connection.add_termination_listener(lambda connection: closed.set())
+                for channel in self._handlers:
+                    await self._connection.add_listener(channel, self._dispatch)
+                for handler in self._reconnect_handlers:
+                    handler()
+                await closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Notification listener error: {e}")
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def start(self):
+        if self._task is None and self._handlers:
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+
+listener = PgListener(DATABASE_URL)
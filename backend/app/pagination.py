@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import MAX_PAGE_LIMIT
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: UUID, rank: Optional[float] = None) -> str:
+    values = [created_at.isoformat(), str(row_id)]
+    if rank is not None:
+        values.append(rank)
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id, *rank = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), UUID(row_id), float(rank[0]) if rank else None
+    except (ValueError, TypeError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def limit_query(default: Optional[int] = None):
+    # Параметр limit маршрутов: меньше 1 или больше MAX_PAGE_LIMIT — 422
+    return Query(default, ge=1, le=MAX_PAGE_LIMIT or None)
+
+
+def page_limit(limit: Optional[int]) -> Optional[int]:
+    # Страница не больше MAX_PAGE_LIMIT, даже если клиент не передал limit: остаток доступен по X-Next-Cursor
+    if not MAX_PAGE_LIMIT:
+        return limit
+    return MAX_PAGE_LIMIT if limit is None else min(limit, MAX_PAGE_LIMIT)
+
+
+async def paginate(db: AsyncSession, query: Select, model, response: Response, limit: Optional[int] = None,
+                   cursor: Optional[str] = None, skip: int = 0, rank=None):
+    # Стабильный порядок (created_at, id): курсор следующей страницы отдается в X-Next-Cursor.
+    # query выбирает столбцы (см. projections.columns), среди которых должны быть created_at и id.
+    # rank (см. search.search) — сначала более релевантные; курсор тогда включает и ранг
+    if rank is None:
+        query = query.order_by(model.created_at, model.id)
+    else:
+        query = query.order_by(rank.desc(), model.created_at, model.id)
+
+    if cursor:
+        created_at, row_id, cursor_rank = decode_cursor(cursor)
+        if rank is None:
+            query = query.where(tuple_(model.created_at, model.id) > tuple_(created_at, row_id))
+        elif cursor_rank is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        else:
+            query = query.where(tuple_(-rank, model.created_at, model.id) > tuple_(-cursor_rank, created_at, row_id))
+    elif skip:
+        query = query.offset(skip)
+
+    limit = page_limit(limit)
+    if limit is None:
+        return (await db.execute(query)).all()
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id,
+                                                             last.rank if rank is not None else None)
+    return rows
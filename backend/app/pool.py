@@ -0,0 +1,82 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# QueuePool._do_get рекурсивно вызывает себя; ожидание учитываем только на внешнем уровне
+_checkout_in_progress = ContextVar("checkout_in_progress", default=False)
+
+# Скользящее среднее ожидания соединения: вес новой выдачи и период полураспада без новых выдач, с
+RECENT_WAIT_WEIGHT = 0.2
+RECENT_WAIT_HALF_LIFE = 1.0
+
+
+class PoolWaitStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self._recent_wait = 0.0
+        self._recorded_at = time.monotonic()
+
+    def record(self, wait_time: float):
+        self.checkouts += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+        self.observe(wait_time)
+
+    def observe(self, wait_time: float):
+        now = time.monotonic()
+        self._recent_wait = self.recent_wait(now) * (1 - RECENT_WAIT_WEIGHT) + wait_time * RECENT_WAIT_WEIGHT
+        self._recorded_at = now
+
+    def recent_wait(self, now: Optional[float] = None) -> float:
+        # Затухает, пока соединения не выдаются: отклоненные из-за перегрузки запросы не держат оценку высокой
+        elapsed = (now or time.monotonic()) - self._recorded_at
+        return self._recent_wait * 0.5 ** (elapsed / RECENT_WAIT_HALF_LIFE)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        if _checkout_in_progress.get():
+            return super()._do_get()
+
+        token = _checkout_in_progress.set(True)
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.timeouts += 1
+            self.wait_stats.observe(time.perf_counter() - started)
+            raise
+        finally:
+            _checkout_in_progress.reset(token)
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def pool_status(pool: InstrumentedAsyncQueuePool):
+    stats = pool.wait_stats
+    return {
+        "pid": os.getpid(),
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "wait_time_total_ms": stats.wait_time_total * 1000,
+        "wait_time_avg_ms": stats.wait_time_total * 1000 / stats.checkouts if stats.checkouts else 0.0,
+        "wait_time_max_ms": stats.wait_time_max * 1000,
+        "wait_time_recent_ms": stats.recent_wait() * 1000,
+    }
@@ -0,0 +1,49 @@
+from collections import defaultdict
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models.bid import BidDecision
+
+# Поля ответа, которые не являются столбцами таблицы и загружаются отдельным запросом
+RELATED_FIELDS = {"decisions"}
+
+# Нужны курсору пагинации, даже если клиент их не запросил
+CURSOR_FIELDS = ("created_at", "id")
+
+
+def parse_fields(fields: Optional[str], schema) -> tuple:
+    # fields=id,title,status — подмножество полей схемы ответа; без параметра отдаются все поля
+    allowed = tuple(schema.model_fields)
+    if not fields:
+        return allowed
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = sorted(requested - set(allowed))
+    if unknown or not requested:
+        raise HTTPException(status_code=422,
+                            detail=f"Unknown fields: {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}")
+    return tuple(field for field in allowed if field in requested)
+
+
+def columns(model, fields: tuple) -> list:
+    # Только нужные столбцы: строки Row не попадают в identity map сессии
+    names = [field for field in fields if field not in RELATED_FIELDS]
+    names += [field for field in CURSOR_FIELDS if field not in names]
+    return [getattr(model, name) for name in names]
+
+
+async def with_decisions(db: AsyncSession, rows: list) -> list:
+    # Решения всех предложений страницы — одним запросом
+    decisions = defaultdict(list)
+    if rows:
+        result = await db.execute(
+            select(BidDecision.bid_id, BidDecision.id, BidDecision.decision, BidDecision.decision_date)
+            .where(BidDecision.bid_id.in_([row.id for row in rows]))
+            .order_by(BidDecision.decision_date, BidDecision.id)
+        )
+        for decision in result:
+            decisions[decision.bid_id].append(decision)
+    return [{**row._mapping, "decisions": decisions[row.id]} for row in rows]
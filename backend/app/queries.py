@@ -0,0 +1,174 @@
+import enum
+import uuid
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import select, exists, func, update, case, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from backend.app.auth import Identity
+from backend.app.models import Bid, Tender, OrganizationResponsible
+from backend.app.models.bid import BidDecision
+
+
+QUORUM_LIMIT = 3
+
+# Связи, которые сериализует BidResponse; загружаются одним дополнительным запросом на страницу
+BID_RESPONSE_OPTIONS = (selectinload(Bid.decisions),)
+
+
+class Access(enum.Enum):
+    GRANTED = "granted"
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
+
+
+class BidAccess(NamedTuple):
+    access: Access
+    bid: Optional[Bid] = None
+    tender: Optional[Tender] = None
+
+    def require(self):
+        if self.access is Access.NOT_FOUND:
+            raise HTTPException(status_code=404, detail="Bid not found")
+        if self.access is Access.FORBIDDEN:
+            raise HTTPException(status_code=403, detail="User is not authorized for this organization")
+        return self.bid, self.tender
+
+
+class TenderAccess(NamedTuple):
+    access: Access
+    tender: Optional[Tender] = None
+
+    def require(self):
+        if self.access is Access.NOT_FOUND:
+            raise HTTPException(status_code=404, detail="Tender not found")
+        if self.access is Access.FORBIDDEN:
+            raise HTTPException(status_code=403, detail="User is not authorized for this organization")
+        return self.tender
+
+
+def is_responsible_for(user: Identity, organization_id):
+    return exists().where(
+        OrganizationResponsible.user_id == user.id,
+        OrganizationResponsible.organization_id == organization_id
+    ).label("is_responsible")
+
+
+def decision_quorum(organization_id):
+    # Кворум: число ответственных организации тендера, но не больше QUORUM_LIMIT
+    return (
+        select(func.least(QUORUM_LIMIT, func.count()))
+        .select_from(OrganizationResponsible)
+        .where(OrganizationResponsible.organization_id == organization_id)
+        .scalar_subquery()
+    )
+
+
+async def fetch_bid(db: AsyncSession, bid_id: UUID, user: Identity, via_tender: bool = False,
+                    for_update: bool = False, options=()) -> BidAccess:
+    # Предложение, его тендер и проверка ответственности одним запросом.
+    # via_tender: права проверяются по организации тендера, а не предложения
+    organization_id = Tender.organization_id if via_tender else Bid.organization_id
+    query = (
+        select(Bid, Tender, is_responsible_for(user, organization_id))
+        .join(Tender, Tender.id == Bid.tender_id)
+        .where(Bid.id == bid_id)
+        .options(*options)
+    )
+    if for_update:
+        query = query.with_for_update(of=Bid)
+
+    row = (await db.execute(query)).first()
+    if row is None:
+        return BidAccess(Access.NOT_FOUND)
+    bid, tender, responsible = row
+    if not responsible:
+        return BidAccess(Access.FORBIDDEN, bid, tender)
+    return BidAccess(Access.GRANTED, bid, tender)
+
+
+async def fetch_bids(db: AsyncSession, bid_ids: list, user: Identity, for_update: bool = False) -> dict:
+    # Пакетный вариант fetch_bid: {bid_id: BidAccess} одним запросом; отсутствующих id в словаре нет.
+    # Строки блокируются в порядке id, чтобы встречные пакеты не взаимоблокировались
+    query = (
+        select(Bid, Tender, is_responsible_for(user, Bid.organization_id))
+        .join(Tender, Tender.id == Bid.tender_id)
+        .where(Bid.id.in_(bid_ids))
+        .order_by(Bid.id)
+    )
+    if for_update:
+        query = query.with_for_update(of=Bid)
+
+    result = {}
+    for bid, tender, responsible in await db.execute(query):
+        result[bid.id] = BidAccess(Access.GRANTED if responsible else Access.FORBIDDEN, bid, tender)
+    return result
+
+
+async def fetch_tender(db: AsyncSession, tender_id: UUID, user: Identity,
+                       for_update: bool = False) -> TenderAccess:
+    query = select(Tender, is_responsible_for(user, Tender.organization_id)).where(Tender.id == tender_id)
+    if for_update:
+        query = query.with_for_update(of=Tender)
+
+    row = (await db.execute(query)).first()
+    if row is None:
+        return TenderAccess(Access.NOT_FOUND)
+    tender, responsible = row
+    if not responsible:
+        return TenderAccess(Access.FORBIDDEN, tender)
+    return TenderAccess(Access.GRANTED, tender)
+
+
+async def update_current(db: AsyncSession, model, row, **values):
+    # Условная запись вместо блокировки при чтении: строка меняется, только если она все еще текущая и ее версия
+    # не изменилась с момента чтения. Возвращает обновленную строку или None при конфликте
+    return await db.scalar(
+        update(model)
+        .where(model.id == row.id, model.is_current, model.version == row.version)
+        .values(**values)
+        .returning(model)
+    )
+
+
+async def record_decision(db: AsyncSession, bid: Bid, tender: Tender, user: Identity, decision: str):
+    # Запись решения, счетчик одобрений, кворум и итоговый статус — одним оператором.
+    # Строка предложения уже заблокирована fetch_bid(for_update=True).
+    # Возвращает статус предложения или None, если пользователь уже голосовал
+    inserted = (
+        pg_insert(BidDecision)
+        .values(id=uuid.uuid4(), bid_id=bid.id, user_id=user.id, decision=decision)
+        .on_conflict_do_nothing(index_elements=[BidDecision.bid_id, BidDecision.user_id])
+        .returning(BidDecision.decision)
+        .cte("inserted")
+    )
+    new_approvals = (
+        select(func.count())
+        .select_from(inserted)
+        .where(inserted.c.decision == "APPROVED")
+        .scalar_subquery()
+    )
+    rejected = exists().select_from(inserted).where(inserted.c.decision == "REJECTED")
+    approvals = Bid.approvals + new_approvals
+    quorum = func.coalesce(Bid.quorum, decision_quorum(tender.organization_id))
+
+    result = await db.execute(
+        update(Bid)
+        .where(Bid.id == bid.id, exists().select_from(inserted))
+        .values(
+            approvals=approvals,
+            quorum=quorum,
+            status=case(
+                (rejected, literal("REJECTED", Bid.status.type)),
+                (approvals >= quorum, literal("APPROVED", Bid.status.type)),
+                else_=Bid.status
+            )
+        )
+        .returning(Bid.status)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar()
@@ -0,0 +1,115 @@
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from backend.app.database import ReplicaSessionLocal, SessionLocal, replica_engine
+
+CONSISTENCY_TOKEN_HEADER = "X-Consistency-Token"
+CONSISTENCY_TOKEN_STATE = "consistency_token"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Состояние текущего запроса на изменение (scope["state"]), куда фиксация транзакции записывает токен
+write_request_state: ContextVar[Optional[dict]] = ContextVar("write_request_state", default=None)
+
+
+def parse_token(token: Optional[str]) -> Optional[int]:
+    # Номер транзакции изменения; None — некорректный токен
+    try:
+        txid = int(token)
+    except (TypeError, ValueError):
+        return None
+    return txid if txid >= 0 else None
+
+
+class ReplicaState:
+    # Горизонт реплики: все транзакции с меньшим номером на ней завершены и воспроизведены. Он только растет,
+    # поэтому устаревшее значение безопасно: токен ниже него обслуживается репликой без запроса к ней
+    def __init__(self):
+        self.horizon = 0
+
+    async def caught_up(self, txid: int) -> bool:
+        if txid < self.horizon:
+            return True
+        try:
+            async with replica_engine.connect() as connection:
+                in_recovery, horizon = (await connection.execute(
+                    text("SELECT pg_is_in_recovery(), txid_snapshot_xmin(txid_current_snapshot())")
+                )).one()
+        except Exception as e:
+            print(f"Replica check error: {e}")
+            return False
+        if not in_recovery:
+            # Сервер не в режиме восстановления (не реплика): данные актуальны
+            return True
+        self.horizon = max(self.horizon, horizon)
+        return txid < self.horizon
+
+
+replica_state = ReplicaState()
+
+
+async def read_sessionmaker(token: Optional[str] = None):
+    # Реплика, если она настроена и клиент не ждет записи, которую она еще не воспроизвела
+    if ReplicaSessionLocal is None:
+        return SessionLocal
+    if token:
+        txid = parse_token(token)
+        if txid is None or not await replica_state.caught_up(txid):
+            return SessionLocal
+    return ReplicaSessionLocal
+
+
+async def get_read_sessionmaker(request: Request):
+    return await read_sessionmaker(request.headers.get(CONSISTENCY_TOKEN_HEADER))
+
+
+async def get_read_db(session_factory=Depends(get_read_sessionmaker)):
+    async with session_factory() as db:
+        yield db
+
+
+def stash_consistency_token(session: Session):
+    # Номер транзакции читается в ней же перед фиксацией, без отдельного соединения. Транзакция без изменений
+    # номера не получает, и токена у нее нет
+    state = write_request_state.get()
+    if state is None:
+        return
+    txid = session.execute(text("SELECT txid_current_if_assigned()")).scalar()
+    if txid is not None:
+        state[CONSISTENCY_TOKEN_STATE] = max(txid, state.get(CONSISTENCY_TOKEN_STATE, 0))
+
+
+if replica_engine is not None:
+    event.listen(Session, "before_commit", stash_consistency_token)
+
+
+class ConsistencyTokenMiddleware:
+    # Успешный ответ на изменение получает X-Consistency-Token — номер последней зафиксированной им транзакции.
+    # Клиент передает последний полученный токен при чтении и видит свои изменения даже при отставании реплики:
+    # реплика обслуживает чтение, когда все транзакции до токена на ней уже завершены
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or replica_engine is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300 \
+                    and CONSISTENCY_TOKEN_STATE in state:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (CONSISTENCY_TOKEN_HEADER.lower().encode(), str(state[CONSISTENCY_TOKEN_STATE]).encode())
+                ]
+            await send(message)
+
+        reset = write_request_state.set(state)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            write_request_state.reset(reset)
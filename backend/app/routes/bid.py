@@ -1,22 +1,32 @@
 import uuid
+from collections import defaultdict
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, and_
-from sqlalchemy.orm import Session
-from backend.app.models import Bid, Tender, Employee, Organization, OrganizationResponsible
-from backend.app.models.bid import BidDecision, Review
-from backend.app.schemas.bid import BidCreate, BidResponse, BidUpdate, ReviewResponse, ReviewCreate
-from backend.app.database import SessionLocal
-
-router = APIRouter()
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, and_, select, update, exists, insert, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.models import Bid, Tender
+from backend.app.models.bid import Review
+from backend.app.schemas.bid import BidCreate, BidResponse, BidUpdate, ReviewResponse, ReviewCreate, \
+    BidStatusUpdate, BidBulkResponse, BidVersionResponse
+from backend.app.auth import get_user_by_username, resolve_identity
+from backend.app.config import BULK_MAX_ITEMS, VERSION_STORAGE
+from backend.app.database import get_db
+from backend.app.etags import not_modified, precondition, Precondition
+from backend.app.events import BID, event_values, record_event, record_events, visible_events, root_events, \
+    tender_bid_events
+from backend.app.export import check_export_format, export_response
+from backend.app.history import bid_history
+from backend.app.metrics import TimedRoute
+from backend.app.pagination import limit_query, page_limit, paginate, NEXT_CURSOR_HEADER
+from backend.app.projections import parse_fields, columns, with_decisions
+from backend.app.serialization import json_list_response
+from backend.app.queries import fetch_bid, fetch_bids, fetch_tender, record_decision, decision_quorum, \
+    update_current, BID_RESPONSE_OPTIONS, BidAccess, Access
+from backend.app.replica import get_read_db, get_read_sessionmaker
+from backend.app.search import search
+
+router = APIRouter(route_class=TimedRoute)
 
 
 def validate_title(title: str):
@@ -34,36 +44,44 @@ def validate_amount(amount: float):
         raise HTTPException(status_code=422, detail="Amount must be greater than 0")
 
 
-def get_user_by_username(username: str, db: Session):
-    if not username:
-        raise HTTPException(status_code=403, detail="Unauthorized user")
-    user = db.query(Employee).filter(Employee.username == username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+async def mark_bid_versions_outdated(current_bid: Bid, db: AsyncSession) -> bool:
+    # Условие на версию — проверка конкурентного изменения в том же операторе; False — строку успели изменить
+    result = await db.execute(
+        update(Bid)
+        .where(Bid.bid_root_id == current_bid.bid_root_id, Bid.is_current,
+               Bid.version == current_bid.version)
+        .values(is_current=False)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
 
 
-def check_user_responsibility(user_id: UUID, organization_id: UUID, db: Session):
-    responsible = db.query(OrganizationResponsible).filter_by(
-        user_id=user_id,
-        organization_id=organization_id
-    ).first()
-    if not responsible:
-        raise HTTPException(status_code=403, detail="User is not authorized for this organization")
+def check_batch_size(items: list):
+    if not items:
+        raise HTTPException(status_code=422, detail="Batch must not be empty")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Batch must not exceed {BULK_MAX_ITEMS} items")
 
 
-def get_bid_by_id(bid_id: UUID, db: Session):
-    bid = db.query(Bid).filter(Bid.id == bid_id).first()
-    if not bid:
-        raise HTTPException(status_code=404, detail="Bid not found")
-    return bid
+def bulk_result(index: int, error: HTTPException = None) -> dict:
+    if error is None:
+        return {"index": index, "status_code": 200}
+    return {"index": index, "status_code": error.status_code, "detail": error.detail}
 
 
-def get_tender_by_id(tender_id: UUID, db: Session):
-    tender = db.query(Tender).filter(Tender.id == tender_id).first()
-    if not tender:
-        raise HTTPException(status_code=404, detail="Tender not found")
-    return tender
+def reject_batch(response: Response, results: list, atomic: bool) -> bool:
+    # Все или ничего: при ошибке в любом элементе пакет не применяется, остальные элементы получают 424
+    if not atomic or all(result["status_code"] == 200 for result in results):
+        return False
+    response.status_code = 422
+    for result in results:
+        if result["status_code"] == 200:
+            result.update(status_code=424, detail="Batch was not applied")
+    return True
+
+
+# Режим delta правит текущую строку на месте, и в ответе остаются ее решения
+VERSION_RESPONSE_OPTIONS = BID_RESPONSE_OPTIONS if VERSION_STORAGE == "delta" else ()
 
 
 def handle_exception(e: Exception):
@@ -71,40 +89,44 @@ def handle_exception(e: Exception):
     raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+def visible_bids_query(fields: tuple, organization_ids: list):
+    # Текущие версии предложений организаций пользователя и опубликованные предложения по их тендерам
+    return select(*columns(Bid, fields)).where(
+        Bid.is_current,
+        (Bid.organization_id.in_(organization_ids)) | and_(
+            Bid.status == "PUBLISHED",
+            exists().where(Tender.id == Bid.tender_id, Tender.organization_id.in_(organization_ids))
+        )
+    )
+
+
 @router.get("/", response_model=list[BidResponse])
-def get_bids(
-        skip: int = 0,
-        limit: int = 100,
+async def get_bids(
+        request: Request,
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = limit_query(100),
+        cursor: str = None,
         username: str = None,
-        db: Session = Depends(get_db)
+        q: str = None,
+        fields: str = None,
+        db: AsyncSession = Depends(get_read_db)
 ):
     try:
-        user = get_user_by_username(username, db)
-
-        subquery = db.query(
-            Bid.bid_root_id, func.max(Bid.version).label("max_version")
-        ).group_by(Bid.bid_root_id).subquery()
-
-        bids_query = (
-            db.query(Bid)
-            .join(subquery, (Bid.bid_root_id == subquery.c.bid_root_id) & (Bid.version == subquery.c.max_version))
-        )
+        fields = parse_fields(fields, BidResponse)
+        user = await get_user_by_username(username, db)
 
-        responsible_orgs = db.query(OrganizationResponsible.organization_id).filter(
-            OrganizationResponsible.user_id == user.id
-        ).subquery()
+        responsible_orgs = user.organization_ids
+        bids_query, rank = search(Bid, visible_bids_query(fields, responsible_orgs), q)
 
-        bids_query = bids_query.filter(
-            (Bid.organization_id.in_(responsible_orgs)) | and_(
-                Bid.status == "PUBLISHED",
-                db.query(Tender.organization_id)
-                .filter(Tender.id == Bid.tender_id, Tender.organization_id.in_(responsible_orgs))
-                .exists()
-            )
-        )
+        cached = await not_modified(db, request, response, visible_events(BID, responsible_orgs), responsible_orgs)
+        if cached:
+            return cached
 
-        bids = bids_query.offset(skip).limit(limit).all()
-        return bids
+        bids = await paginate(db, bids_query, Bid, response, limit=limit, cursor=cursor, skip=skip, rank=rank)
+        if "decisions" in fields:
+            bids = await with_decisions(db, bids)
+        return json_list_response(BidResponse, bids, response, fields)
 
     except HTTPException as http_exc:
         raise http_exc
@@ -113,29 +135,92 @@ def get_bids(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_bids(
+        format: str = "ndjson",
+        username: str = None,
+        fields: str = None,
+        session_factory=Depends(get_read_sessionmaker),
+        db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        check_export_format(format)
+        fields = parse_fields(fields, BidResponse)
+        user = await get_user_by_username(username, db)
+
+        bids_query = visible_bids_query(fields, user.organization_ids).order_by(Bid.created_at, Bid.id)
+        return export_response(bids_query, BidResponse, fields, format, "bids", session_factory)
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        handle_exception(e)
+
+
+@router.get("/reviews/export", response_class=StreamingResponse)
+async def export_reviews(
+        format: str = "ndjson",
+        username: str = None,
+        fields: str = None,
+        session_factory=Depends(get_read_sessionmaker),
+        db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        check_export_format(format)
+        fields = parse_fields(fields, ReviewResponse)
+        user = await get_user_by_username(username, db)
+
+        # Отзывы на предложения организаций пользователя и на предложения по их тендерам, включая прежние версии
+        reviewed_bids = select(Bid.id).join(Tender, Tender.id == Bid.tender_id).where(
+            Bid.organization_id.in_(user.organization_ids) | Tender.organization_id.in_(user.organization_ids)
+        )
+        reviews_query = (
+            select(*columns(Review, fields))
+            .where(Review.bid_id.in_(reviewed_bids))
+            .order_by(Review.created_at, Review.id)
+        )
+        return export_response(reviews_query, ReviewResponse, fields, format, "reviews", session_factory)
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        handle_exception(e)
+
+
 @router.get("/my", response_model=list[BidResponse])
-def get_user_bids(
+async def get_user_bids(
         username: str,
-        db: Session = Depends(get_db)
+        request: Request,
+        response: Response,
+        limit: int = limit_query(),
+        cursor: str = None,
+        q: str = None,
+        fields: str = None,
+        db: AsyncSession = Depends(get_read_db)
 ):
     try:
-        user = get_user_by_username(username, db)
-
-        subquery = db.query(
-            Bid.bid_root_id, func.max(Bid.version).label("max_version")
-        ).group_by(Bid.bid_root_id).subquery()
+        fields = parse_fields(fields, BidResponse)
+        user = await get_user_by_username(username, db)
 
         # Основной запрос для получения последних версий предложений пользователя
-        bids = (
-            db.query(Bid)
-            .join(subquery, (Bid.bid_root_id == subquery.c.bid_root_id) & (Bid.version == subquery.c.max_version))
-            .filter(Bid.creator_id == user.id)
-            .all()
+        bids_query = (
+            select(*columns(Bid, fields))
+            .where(Bid.creator_id == user.id, Bid.is_current)
         )
+        bids_query, rank = search(Bid, bids_query, q)
+        # Предложения пользователя меняют и другие ответственные организации, в том числе после его ухода из нее
+        own_bids = select(Bid.bid_root_id).where(Bid.creator_id == user.id, Bid.is_current)
+        cached = await not_modified(db, request, response, root_events(BID, own_bids))
+        if cached:
+            return cached
+
+        bids = await paginate(db, bids_query, Bid, response, limit=limit, cursor=cursor, rank=rank)
 
-        if not bids:
+        if not bids and not cursor:
             raise HTTPException(status_code=404, detail="No bids found for this user")
-        return bids
+        if "decisions" in fields:
+            bids = await with_decisions(db, bids)
+        return json_list_response(BidResponse, bids, response, fields)
 
     except HTTPException as http_exc:
         raise http_exc
@@ -144,28 +229,20 @@ def get_user_bids(
 
 
 @router.post("/new", response_model=BidResponse)
-def create_bid(
+async def create_bid(
         bid: BidCreate,
         username: str = None,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     try:
-        creator = get_user_by_username(username, db)
+        creator = await get_user_by_username(username, db)
 
-        responsible = db.query(OrganizationResponsible).filter(
-            OrganizationResponsible.user_id == creator.id
-        ).first()
-
-        if not responsible:
+        if not creator.organization_ids:
             raise HTTPException(status_code=403,
                                 detail="User is not responsible for any organization")
+        organization_id = creator.organization_ids[0]
 
-        organization = db.query(Organization).filter(
-            Organization.id == responsible.organization_id).first()
-        if not organization:
-            raise HTTPException(status_code=404, detail="Organization not found")
-
-        tender = db.query(Tender).filter(Tender.id == bid.tender_id).first()
+        tender = await db.scalar(select(Tender).where(Tender.id == bid.tender_id))
         if not tender:
             raise HTTPException(status_code=404, detail="Tender not found")
 
@@ -178,7 +255,7 @@ def create_bid(
         new_bid = Bid(
             bid_root_id=uuid.uuid4(),
             tender_id=bid.tender_id,
-            organization_id=organization.id,
+            organization_id=organization_id,
             creator_id=creator.id,
             title=bid.title,
             description=bid.description,
@@ -186,13 +263,15 @@ def create_bid(
             status="CREATED",
             quorum=None,
             version=1,
+            is_current=True,
             created_at=func.now(),
-            updated_at=func.now()
+            updated_at=func.now(),
+            decisions=[]
         )
 
         db.add(new_bid)
-        db.commit()
-        db.refresh(new_bid)
+        await record_event(db, BID, "created", new_bid, None, tender.organization_id)
+        await db.commit()
 
         return new_bid
 
@@ -202,35 +281,195 @@ def create_bid(
         handle_exception(e)
 
 
+@router.post("/bulk", response_model=BidBulkResponse)
+async def create_bids_bulk(
+        bids: list[BidCreate],
+        response: Response,
+        atomic: bool = True,
+        username: str = None,
+        db: AsyncSession = Depends(get_db)
+):
+    try:
+        check_batch_size(bids)
+        creator = await get_user_by_username(username, db)
+
+        if not creator.organization_ids:
+            raise HTTPException(status_code=403,
+                                detail="User is not responsible for any organization")
+        organization_id = creator.organization_ids[0]
+
+        tender_organizations = dict((await db.execute(
+            select(Tender.id, Tender.organization_id).where(Tender.id.in_({bid.tender_id for bid in bids}))
+        )).all())
+
+        results = []
+        for index, bid in enumerate(bids):
+            try:
+                if bid.tender_id not in tender_organizations:
+                    raise HTTPException(status_code=404, detail="Tender not found")
+                if not bid.title or not bid.description or not bid.amount:
+                    raise HTTPException(status_code=400, detail="Title, description, and amount are required")
+                validate_title(bid.title)
+                validate_description(bid.description)
+                validate_amount(bid.amount)
+                results.append(bulk_result(index))
+            except HTTPException as item_exc:
+                results.append(bulk_result(index, item_exc))
+
+        if reject_batch(response, results, atomic):
+            return {"applied": False, "results": results}
+
+        accepted = [result for result in results if result["status_code"] == 200]
+        if accepted:
+            # Одна вставка на пакет: insertmanyvalues собирает строки в многострочный INSERT ... RETURNING
+            rows = (await db.execute(
+                insert(Bid).returning(*columns(Bid, tuple(BidResponse.model_fields)), sort_by_parameter_order=True),
+                [
+                    {
+                        "bid_root_id": uuid.uuid4(),
+                        "tender_id": bids[result["index"]].tender_id,
+                        "organization_id": organization_id,
+                        "creator_id": creator.id,
+                        "title": bids[result["index"]].title,
+                        "description": bids[result["index"]].description,
+                        "amount": bids[result["index"]].amount,
+                        "status": "CREATED",
+                        "version": 1,
+                        "is_current": True
+                    }
+                    for result in accepted
+                ]
+            )).all()
+            await record_events(db, [event_values(BID, "created", row, None, tender_organizations[row.tender_id])
+                                     for row in rows])
+            await db.commit()
+
+            for result, row in zip(accepted, rows):
+                result["bid"] = {**row._mapping, "decisions": []}
+
+        return {"applied": bool(accepted), "results": results}
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        handle_exception(e)
+
+
+@router.patch("/status:bulk", response_model=BidBulkResponse)
+async def update_bids_status_bulk(
+        items: list[BidStatusUpdate],
+        response: Response,
+        atomic: bool = True,
+        username: str = None,
+        db: AsyncSession = Depends(get_db)
+):
+    try:
+        check_batch_size(items)
+        user = await get_user_by_username(username, db)
+        bids = await fetch_bids(db, list({item.bid_id for item in items}), user, for_update=True)
+
+        results = []
+        seen = set()
+        for index, item in enumerate(items):
+            try:
+                if item.bid_id in seen:
+                    raise HTTPException(status_code=422, detail="Duplicate bid in batch")
+                seen.add(item.bid_id)
+                bid, _ = bids.get(item.bid_id, BidAccess(Access.NOT_FOUND)).require()
+                if item.new_status not in ["PUBLISHED", "CANCELED"]:
+                    raise HTTPException(status_code=400, detail="Invalid status")
+                # id прежней версии — конфликт, как в update_bid_status
+                Precondition().check(bid)
+                results.append(bulk_result(index))
+            except HTTPException as item_exc:
+                results.append(bulk_result(index, item_exc))
+
+        if reject_batch(response, results, atomic):
+            await db.rollback()
+            return {"applied": False, "results": results}
+
+        accepted = [result for result in results if result["status_code"] == 200]
+        by_status = defaultdict(list)
+        for result in accepted:
+            by_status[items[result["index"]].new_status].append(items[result["index"]].bid_id)
+
+        # Один UPDATE на каждый новый статус; кворум фиксируется при первой публикации, как в update_bid_status.
+        # Условие то же, что в update_current: строка все еще текущая и ее версия не изменилась с проверки
+        updated = []
+        for new_status, bid_ids in by_status.items():
+            values = {"status": new_status}
+            if new_status == "PUBLISHED":
+                tender_organization = select(Tender.organization_id).where(Tender.id == Bid.tender_id).correlate(Bid)
+                values["quorum"] = func.coalesce(Bid.quorum, decision_quorum(tender_organization.scalar_subquery()))
+            updated += (await db.execute(
+                update(Bid)
+                .where(tuple_(Bid.id, Bid.version).in_([(bid_id, bids[bid_id].bid.version) for bid_id in bid_ids]),
+                       Bid.is_current)
+                .values(**values)
+                .returning(*columns(Bid, tuple(BidResponse.model_fields)))
+                .execution_options(synchronize_session=False)
+            )).all()
+
+        matched = {row.id for row in updated}
+        for result in accepted:
+            if items[result["index"]].bid_id not in matched:
+                result.update(bulk_result(result["index"], Precondition().error()))
+        if reject_batch(response, results, atomic):
+            await db.rollback()
+            return {"applied": False, "results": results}
+        accepted = [result for result in accepted if result["status_code"] == 200]
+
+        await record_events(db, [event_values(BID, "status", row, bids[row.id].bid.status,
+                                              bids[row.id].tender.organization_id) for row in updated])
+        updated = {bid["id"]: bid for bid in await with_decisions(db, updated)}
+        await db.commit()
+
+        for result in accepted:
+            result["bid"] = updated[items[result["index"]].bid_id]
+
+        return {"applied": bool(accepted), "results": results}
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        handle_exception(e)
+
+
 @router.get("/{tender_id}/list", response_model=list[BidResponse])
-def get_bids_for_tender(
+async def get_bids_for_tender(
         tender_id: UUID,
+        request: Request,
+        response: Response,
+        limit: int = limit_query(),
+        cursor: str = None,
         username: str = None,
-        db: Session = Depends(get_db)
+        q: str = None,
+        fields: str = None,
+        db: AsyncSession = Depends(get_read_db)
 ):
     try:
-        user = get_user_by_username(username, db)
-        tender = get_tender_by_id(tender_id, db)
-        check_user_responsibility(user.id, tender.organization_id, db)
-
-        subquery = db.query(
-            Bid.bid_root_id, func.max(Bid.version).label("max_version")
-        ).group_by(Bid.bid_root_id).subquery()
-
-        bids_query = db.query(Bid).join(
-            subquery,
-            (Bid.bid_root_id == subquery.c.bid_root_id) & (Bid.version == subquery.c.max_version)
-        ).filter(
+        fields = parse_fields(fields, BidResponse)
+        user = await get_user_by_username(username, db)
+        (await fetch_tender(db, tender_id, user)).require()
+
+        bids_query = select(*columns(Bid, fields)).where(
             Bid.tender_id == tender_id,
-            Bid.status == "PUBLISHED"
+            Bid.status == "PUBLISHED",
+            Bid.is_current
         )
+        bids_query, rank = search(Bid, bids_query, q)
+        cached = await not_modified(db, request, response, tender_bid_events(tender_id))
+        if cached:
+            return cached
 
-        bids = bids_query.all()
+        bids = await paginate(db, bids_query, Bid, response, limit=limit, cursor=cursor, rank=rank)
 
-        if not bids:
+        if not bids and not cursor:
             raise HTTPException(status_code=404, detail="No bids found for this tender")
 
-        return bids
+        if "decisions" in fields:
+            bids = await with_decisions(db, bids)
+        return json_list_response(BidResponse, bids, response, fields)
 
     except HTTPException as http_exc:
         raise http_exc
@@ -239,23 +478,32 @@ def get_bids_for_tender(
 
 
 @router.patch("/{bid_id}/status", response_model=BidResponse)
-def update_bid_status(
+async def update_bid_status(
         bid_id: UUID,
         new_status: str,
         username: str = None,
-        db: Session = Depends(get_db)
+        expected_version: int = None,
+        if_match: str = Header(None),
+        db: AsyncSession = Depends(get_db)
 ):
     try:
-        user = get_user_by_username(username, db)
-        bid = get_bid_by_id(bid_id, db)
-        check_user_responsibility(user.id, bid.organization_id, db)
+        condition = precondition(if_match, expected_version)
+        user = await get_user_by_username(username, db)
+        bid, tender = (await fetch_bid(db, bid_id, user, options=BID_RESPONSE_OPTIONS)).require()
 
         if new_status not in ["PUBLISHED", "CANCELED"]:
             raise HTTPException(status_code=400, detail="Invalid status")
 
-        bid.status = new_status
-        db.commit()
-        db.refresh(bid)
+        condition.check(bid)
+        previous_status = bid.status
+        values = {"status": new_status}
+        if new_status == "PUBLISHED":
+            values["quorum"] = func.coalesce(Bid.quorum, decision_quorum(tender.organization_id))
+        bid = await update_current(db, Bid, bid, **values)
+        if bid is None:
+            condition.fail()
+        await record_event(db, BID, "status", bid, previous_status, tender.organization_id)
+        await db.commit()
 
         return bid
 
@@ -266,16 +514,18 @@ def update_bid_status(
 
 
 @router.patch("/{bid_id}/edit", response_model=BidResponse)
-def update_bid(
+async def update_bid(
         bid_id: UUID,
         bid: BidUpdate,
         username: str = None,
-        db: Session = Depends(get_db)
+        expected_version: int = None,
+        if_match: str = Header(None),
+        db: AsyncSession = Depends(get_db)
 ):
     try:
-        user = get_user_by_username(username, db)
-        current_bid = get_bid_by_id(bid_id, db)
-        check_user_responsibility(user.id, current_bid.organization_id, db)
+        condition = precondition(if_match, expected_version)
+        user = await get_user_by_username(username, db)
+        current_bid, tender = (await fetch_bid(db, bid_id, user, options=VERSION_RESPONSE_OPTIONS)).require()
 
         if not bid.title or not bid.description or bid.amount is None:
             raise HTTPException(status_code=400,
@@ -290,23 +540,39 @@ def update_bid(
         for key, value in bid.dict(exclude_unset=True).items():
             new_bid_data[key] = value
 
-        new_bid = Bid(
-            bid_root_id=current_bid.bid_root_id,
-            organization_id=current_bid.organization_id,
-            tender_id=current_bid.tender_id,
-            title=new_bid_data["title"],
-            description=new_bid_data["description"],
-            amount=new_bid_data["amount"],
-            status=new_bid_data["status"],
-            version=current_bid.version + 1,
-            creator_id=current_bid.creator_id,
-            created_at=current_bid.created_at,
-            updated_at=func.now()
-        )
+        condition.check(current_bid)
+        previous_status = current_bid.status
+        if VERSION_STORAGE == "delta":
+            new_bid = await bid_history.apply(db, current_bid, {
+                "title": new_bid_data["title"],
+                "description": new_bid_data["description"],
+                "amount": new_bid_data["amount"],
+                "status": new_bid_data["status"]
+            })
+            if new_bid is None:
+                condition.fail()
+        else:
+            new_bid = Bid(
+                bid_root_id=current_bid.bid_root_id,
+                organization_id=current_bid.organization_id,
+                tender_id=current_bid.tender_id,
+                title=new_bid_data["title"],
+                description=new_bid_data["description"],
+                amount=new_bid_data["amount"],
+                status=new_bid_data["status"],
+                version=current_bid.version + 1,
+                creator_id=current_bid.creator_id,
+                quorum=current_bid.quorum,
+                created_at=current_bid.created_at,
+                updated_at=func.now(),
+                decisions=[]
+            )
 
-        db.add(new_bid)
-        db.commit()
-        db.refresh(new_bid)
+            if not await mark_bid_versions_outdated(current_bid, db):
+                condition.fail()
+            db.add(new_bid)
+        await record_event(db, BID, "edited", new_bid, previous_status, tender.organization_id)
+        await db.commit()
 
         return new_bid
 
@@ -317,42 +583,55 @@ def update_bid(
 
 
 @router.put("/{bid_id}/rollback/{version}", response_model=BidResponse)
-def rollback_bid(
+async def rollback_bid(
         bid_id: UUID,
         version: int,
         username: str = None,
-        db: Session = Depends(get_db)
+        expected_version: int = None,
+        if_match: str = Header(None),
+        db: AsyncSession = Depends(get_db)
 ):
     try:
-        user = get_user_by_username(username, db)
-        current_bid = get_bid_by_id(bid_id, db)
-        check_user_responsibility(user.id, current_bid.organization_id, db)
+        condition = precondition(if_match, expected_version)
+        user = await get_user_by_username(username, db)
+        current_bid, tender = (await fetch_bid(db, bid_id, user, options=VERSION_RESPONSE_OPTIONS)).require()
 
-        rollback_version = db.query(Bid).filter(
-            Bid.bid_root_id == current_bid.bid_root_id,
-            Bid.version == version
-        ).first()
+        rollback_version = await bid_history.version(db, current_bid.bid_root_id, version)
 
         if not rollback_version:
             raise HTTPException(status_code=404, detail="Version not found for the bid")
 
-        new_bid = Bid(
-            bid_root_id=current_bid.bid_root_id,
-            organization_id=rollback_version.organization_id,
-            tender_id=rollback_version.tender_id,
-            title=rollback_version.title,
-            description=rollback_version.description,
-            amount=rollback_version.amount,
-            status=rollback_version.status,
-            version=current_bid.version + 1,
-            creator_id=rollback_version.creator_id,
-            created_at=current_bid.created_at,
-            updated_at=func.now()
-        )
+        condition.check(current_bid)
+        previous_status = current_bid.status
+        if VERSION_STORAGE == "delta":
+            new_bid = await bid_history.apply(db, current_bid, {
+                field: rollback_version[field]
+                for field in ("title", "description", "amount", "status", "tender_id", "quorum")
+            })
+            if new_bid is None:
+                condition.fail()
+        else:
+            new_bid = Bid(
+                bid_root_id=current_bid.bid_root_id,
+                organization_id=rollback_version["organization_id"],
+                tender_id=rollback_version["tender_id"],
+                title=rollback_version["title"],
+                description=rollback_version["description"],
+                amount=rollback_version["amount"],
+                status=rollback_version["status"],
+                version=current_bid.version + 1,
+                creator_id=rollback_version["creator_id"],
+                quorum=rollback_version["quorum"],
+                created_at=current_bid.created_at,
+                updated_at=func.now(),
+                decisions=[]
+            )
 
-        db.add(new_bid)
-        db.commit()
-        db.refresh(new_bid)
+            if not await mark_bid_versions_outdated(current_bid, db):
+                condition.fail()
+            db.add(new_bid)
+        await record_event(db, BID, "rolled_back", new_bid, previous_status, tender.organization_id)
+        await db.commit()
 
         return new_bid
 
@@ -362,72 +641,63 @@ def rollback_bid(
         handle_exception(e)
 
 
+@router.get("/{bid_id}/versions", response_model=list[BidVersionResponse])
+async def get_bid_versions(
+        bid_id: UUID,
+        response: Response,
+        limit: int = limit_query(20),
+        cursor: int = None,
+        username: str = None,
+        db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        user = await get_user_by_username(username, db)
+        bid, _ = (await fetch_bid(db, bid_id, user)).require()
+
+        # От новых версий к старым; cursor — номер версии, после которой продолжить
+        limit = page_limit(limit)
+        versions = await bid_history.versions(db, bid.bid_root_id, cursor, limit + 1 if limit else None)
+        if limit and len(versions) > limit:
+            versions = versions[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = str(versions[-1]["version"])
+
+        return json_list_response(BidVersionResponse, versions, response)
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        handle_exception(e)
+
+
 @router.post("/submit_decision")
-def submit_bid_decision(
+async def submit_bid_decision(
         bid_id: UUID,
         decision: str,
         username: str = None,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     try:
-        user = get_user_by_username(username, db)
+        user = await get_user_by_username(username, db)
 
-        bid = db.query(Bid).filter(Bid.id == bid_id).first()
-        if not bid:
-            raise HTTPException(status_code=404, detail="Bid not found")
+        bid, tender = (await fetch_bid(db, bid_id, user, via_tender=True, for_update=True)).require()
 
         if bid.status in ["REJECTED", "APPROVED"]:
             raise HTTPException(status_code=400,
                                 detail=f"Bid is already {bid.status}. No further decisions allowed.")
 
-        tender = db.query(Tender).filter(Tender.id == bid.tender_id).first()
-        if not tender:
-            raise HTTPException(status_code=404, detail="Tender not found")
-
-        check_user_responsibility(user.id, tender.organization_id, db)
-
         if decision not in ["REJECTED", "APPROVED"]:
             raise HTTPException(status_code=400, detail="Invalid decision")
 
-        # Проверка, не существует ли уже решение от этого пользователя для данного предложения
-        existing_decision = db.query(BidDecision).filter(
-            BidDecision.bid_id == bid.id,
-            BidDecision.user_id == user.id
-        ).first()
-
-        if existing_decision:
+        status = await record_decision(db, bid, tender, user, decision)
+        if status is None:
             raise HTTPException(status_code=400,
                                 detail="User has already submitted a decision for this bid")
+        await record_event(db, BID, "decision", bid, bid.status, tender.organization_id, status=status)
+        await db.commit()
 
-        new_decision = BidDecision(
-            bid_id=bid.id,
-            user_id=user.id,
-            decision=decision
-        )
-        db.add(new_decision)
-        db.commit()
-
-        # Проверка на отклонение предложения при наличии хотя бы одного "REJECTED"
-        if decision == "REJECTED":
-            bid.status = "REJECTED"
-            db.commit()
+        if status == "REJECTED":
             return {"status": "Bid has been rejected"}
-
-        responsible_users = db.query(OrganizationResponsible).filter(
-            OrganizationResponsible.organization_id == tender.organization_id
-        ).count()
-
-        quorum = min(3, responsible_users)
-
-        # Подсчет количества одобрений
-        approvals = db.query(BidDecision).filter(
-            BidDecision.bid_id == bid.id,
-            BidDecision.decision == "APPROVED"
-        ).count()
-
-        if approvals >= quorum:
-            bid.status = "APPROVED"
-            db.commit()
+        if status == "APPROVED":
             return {"status": "Bid has been approved"}
 
         return {"status": "Decision recorded, awaiting further responses"}
@@ -439,33 +709,32 @@ def submit_bid_decision(
 
 
 @router.get("/{bid_id}/reviews", response_model=list[ReviewResponse])
-def get_reviews(
+async def get_reviews(
         bid_id: UUID,
         authorUsername: str,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_read_db),
         username: str = None
 ):
     try:
-        user = get_user_by_username(username, db)
-        bid = get_bid_by_id(bid_id, db)
-        tender = get_tender_by_id(bid.tender_id, db)
-        check_user_responsibility(user.id, tender.organization_id, db)
+        user = await get_user_by_username(username, db)
+        bid, tender = (await fetch_bid(db, bid_id, user, via_tender=True)).require()
 
-        author = db.query(Employee).filter(Employee.username == authorUsername).first()
+        author = await resolve_identity(authorUsername, db)
         if not author:
             raise HTTPException(status_code=404, detail="Author not found")
 
-        bids = db.query(Bid).filter(Bid.creator_id == author.id, Bid.tender_id == tender.id).all()
+        has_bids = await db.scalar(select(
+            exists().where(Bid.creator_id == author.id, Bid.tender_id == tender.id)
+        ))
 
-        if not bids:
+        if not has_bids:
             raise HTTPException(status_code=404,
                                 detail="No bids found for this author in the specified tender")
 
-        author_bids = db.query(Bid).filter(Bid.creator_id == author.id).all()
-        bid_ids = [bid.id for bid in author_bids]
-        reviews = db.query(Review).filter(Review.bid_id.in_(bid_ids)).all()
+        author_bids = select(Bid.id).where(Bid.creator_id == author.id)
+        reviews = (await db.scalars(select(Review).where(Review.bid_id.in_(author_bids)))).all()
 
-        return reviews
+        return json_list_response(ReviewResponse, reviews)
 
     except HTTPException as http_exc:
         raise http_exc
@@ -474,20 +743,18 @@ def get_reviews(
 
 
 @router.post("/feedback", response_model=ReviewResponse)
-def create_review(
+async def create_review(
         bid_id: UUID,
         authorUsername: str,
         review_data: ReviewCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         username: str = None
 ):
     try:
-        user = get_user_by_username(username, db)
-        bid = get_bid_by_id(bid_id, db)
-        tender = get_tender_by_id(bid.tender_id, db)
-        check_user_responsibility(user.id, tender.organization_id, db)
+        user = await get_user_by_username(username, db)
+        bid, tender = (await fetch_bid(db, bid_id, user, via_tender=True)).require()
 
-        author = db.query(Employee).filter(Employee.username == authorUsername).first()
+        author = await resolve_identity(authorUsername, db)
         if not author:
             raise HTTPException(status_code=404, detail="Author not found")
 
@@ -504,8 +771,7 @@ def create_review(
         )
 
         db.add(new_review)
-        db.commit()
-        db.refresh(new_review)
+        await db.commit()
 
         return new_review
 
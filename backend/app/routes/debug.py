@@ -1,59 +1,66 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from backend.app.models.employee import Employee
 from backend.app.models.organization import OrganizationResponsible
 from backend.app.models.tender import Tender
-from backend.app.database import SessionLocal
-from backend.app.schemas.debug import EmployeeResponse, TenderByCompanyResponse, OrganizationResponse
+from backend.app.admission import admission
+from backend.app.database import engine
+from backend.app.metrics import TimedRoute
+from backend.app.pool import pool_status
+from backend.app.replica import get_read_db
+from backend.app.serialization import json_list_response
+from backend.app.slow_queries import slow_query_log
+from backend.app.schemas.debug import EmployeeResponse, TenderByCompanyResponse, PoolStatsResponse, \
+    SlowQueryResponse, AdmissionStatsResponse
 from uuid import UUID
 
 
-router = APIRouter()
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/users", response_model=list[EmployeeResponse])
-def get_users(db: Session = Depends(get_db)):
-    users = db.query(Employee).options(
-        joinedload(Employee.organizations).joinedload(OrganizationResponsible.organization)).all()
+async def get_users(db: AsyncSession = Depends(get_read_db)):
+    users = (await db.scalars(select(Employee).options(
+        joinedload(Employee.organizations).joinedload(OrganizationResponsible.organization)))).unique().all()
 
     if not users:
         raise HTTPException(status_code=404, detail="No users found")
 
-    result = []
-    for user in users:
-        organizations = [OrganizationResponse(
-            id=org.organization.id,
-            name=org.organization.name,
-            description=org.organization.description,
-            type=org.organization.type
-        ) for org in user.organizations]
-
-        user_response = EmployeeResponse(
-            id=user.id,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            organizations=organizations,
-            created_at=user.created_at,
-            updated_at=user.updated_at
-        )
-        result.append(user_response)
-
-    return result
+    # Организации берутся через связь OrganizationResponsible, поэтому ответ собирается из словарей
+    result = [{
+        "id": user.id,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "organizations": [org.organization for org in user.organizations],
+        "created_at": user.created_at,
+        "updated_at": user.updated_at
+    } for user in users]
+
+    return json_list_response(EmployeeResponse, result)
 
 
 @router.get("/tenders/company/{organization_id}", response_model=list[TenderByCompanyResponse])
-def get_tenders_by_company(organization_id: UUID, db: Session = Depends(get_db)):
-    tenders = db.query(Tender).filter(Tender.organization_id == organization_id).all()
+async def get_tenders_by_company(organization_id: UUID, db: AsyncSession = Depends(get_read_db)):
+    tenders = (await db.scalars(select(Tender).where(Tender.organization_id == organization_id))).all()
     if not tenders:
         raise HTTPException(status_code=404, detail="No tenders found for this company")
 
-    return tenders
+    return json_list_response(TenderByCompanyResponse, tenders)
+
+
+@router.get("/pool", response_model=PoolStatsResponse)
+async def get_pool_stats():
+    return pool_status(engine.pool)
+
+
+@router.get("/admission", response_model=AdmissionStatsResponse)
+async def get_admission_stats():
+    return admission.status()
+
+
+@router.get("/slow-queries", response_model=list[SlowQueryResponse])
+async def get_slow_queries():
+    return list(reversed(slow_query_log.entries))
@@ -0,0 +1,78 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.auth import get_user_by_username
+from backend.app.config import EVENTS_HEARTBEAT, EVENTS_MAX_WAIT
+from backend.app.database import get_db
+from backend.app.events import change_feed, decode_position, encode_position
+from backend.app.metrics import TimedRoute
+from backend.app.pagination import NEXT_CURSOR_HEADER
+from backend.app.schemas.event import ChangeEventResponse
+from backend.app.serialization import JSONBytesResponse
+
+router = APIRouter(route_class=TimedRoute)
+
+# Пауза перед переподключением EventSource после обрыва, мс
+SSE_RETRY_MS = 3000
+
+
+def handle_exception(e: Exception):
+    print(f"Unexpected error: {e}")
+    raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def sse_message(event) -> bytes:
+    return f"id: {event.cursor}\nevent: {event.name}\ndata: ".encode() + event.body + b"\n\n"
+
+
+async def event_stream(position: tuple, organization_ids: tuple, tender_id: UUID = None):
+    yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+    while change_feed.running:
+        events, position = await change_feed.wait(position, organization_ids, tender_id, EVENTS_HEARTBEAT)
+        if events:
+            yield b"".join(sse_message(event) for event in events)
+        else:
+            yield b": keepalive\n\n"
+
+
+@router.get("", response_model=list[ChangeEventResponse])
+async def get_events(
+        request: Request,
+        cursor: str = None,
+        username: str = None,
+        tender_id: UUID = None,
+        wait: float = None,
+        last_event_id: str = Header(None),
+        db: AsyncSession = Depends(get_db)
+):
+    try:
+        if not change_feed.running:
+            raise HTTPException(status_code=503, detail="Change feed is not available")
+
+        organization_ids = ()
+        if username is not None:
+            user = await get_user_by_username(username, db)
+            organization_ids = user.organization_ids
+        # Ожидание событий не удерживает соединение с базой
+        await db.close()
+
+        cursor = cursor or last_event_id
+        position = decode_position(cursor) if cursor else await change_feed.head()
+
+        if "text/event-stream" in request.headers.get("accept", ""):
+            return StreamingResponse(event_stream(position, organization_ids, tender_id),
+                                     media_type="text/event-stream",
+                                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        timeout = EVENTS_MAX_WAIT if wait is None else min(max(wait, 0), EVENTS_MAX_WAIT)
+        events, position = await change_feed.wait(position, organization_ids, tender_id, timeout)
+        return JSONBytesResponse(b"[" + b",".join(event.body for event in events) + b"]",
+                                 headers={NEXT_CURSOR_HEADER: encode_position(position)})
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        handle_exception(e)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Response
+
+from backend.app.health import lifecycle
+from backend.app.metrics import TimedRoute
+from backend.app.schemas.health import HealthResponse
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/live", response_model=HealthResponse)
+async def liveness():
+    return lifecycle.liveness()
+
+
+@router.get("/ready", response_model=HealthResponse)
+async def readiness(response: Response):
+    result = await lifecycle.readiness()
+    if result["status"] != "ok":
+        response.status_code = 503
+    return result
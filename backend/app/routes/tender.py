@@ -1,25 +1,29 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
-from backend.app.models import Bid
 from backend.app.schemas.tender import TenderCreate, TenderResponse, TenderUpdate
-from backend.app.database import SessionLocal
+from backend.app.auth import get_user_by_username, resolve_identity
+from backend.app.cache import public_tenders_cache
+from backend.app.config import VERSION_STORAGE
+from backend.app.database import SessionLocal, get_db
+from backend.app.etags import ETAG_HEADER, list_etag, not_modified, precondition
+from backend.app.events import TENDER, record_event, visible_events
+from backend.app.export import check_export_format, export_response
+from backend.app.history import tender_history
+from backend.app.metrics import TimedRoute
+from backend.app.pagination import limit_query, page_limit, paginate, NEXT_CURSOR_HEADER
+from backend.app.projections import parse_fields, columns
+from backend.app.serialization import json_list_response
+from backend.app.queries import fetch_tender, update_current
+from backend.app.replica import get_read_db, get_read_sessionmaker
+from backend.app.search import search
 from backend.app.models.tender import Tender
-from backend.app.models.organization import Organization, OrganizationResponsible
-from backend.app.models.employee import Employee
 
-router = APIRouter()
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=TimedRoute)
 
 
 def validate_title(title: str):
@@ -41,93 +45,116 @@ def validate_service_type(service_type: str):
                             detail=f"Invalid service type. Allowed types: {', '.join(valid_service_types)}")
 
 
-def get_user_by_username(username: str, db: Session):
-    if not username:
-        raise HTTPException(status_code=403, detail="Unauthorized user")
-    user = db.query(Employee).filter(Employee.username == username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+def handle_exception(e: Exception):
+    print(f"Unexpected error: {e}")
+    raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-def check_user_responsibility(user_id: UUID, organization_id: UUID, db: Session):
-    responsible = db.query(OrganizationResponsible).filter_by(
-        user_id=user_id,
-        organization_id=organization_id
-    ).first()
-    if not responsible:
-        raise HTTPException(status_code=403, detail="User is not authorized for this organization")
+async def mark_tender_versions_outdated(current_tender: Tender, db: AsyncSession) -> bool:
+    # Условие на версию — проверка конкурентного изменения в том же операторе; False — строку успели изменить
+    result = await db.execute(
+        update(Tender)
+        .where(Tender.tender_root_id == current_tender.tender_root_id, Tender.is_current,
+               Tender.version == current_tender.version)
+        .values(is_current=False)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
 
 
-def get_bid_by_id(bid_id: UUID, db: Session):
-    bid = db.query(Bid).filter(Bid.id == bid_id).first()
-    if not bid:
-        raise HTTPException(status_code=404, detail="Bid not found")
-    return bid
+async def validate_tender_user_responsibility(username: str, tender_id: UUID, db: AsyncSession):
+    user = await get_user_by_username(username, db)
+    tender = (await fetch_tender(db, tender_id, user)).require()
+    return user, tender
 
 
-def get_tender_by_id(tender_id: UUID, db: Session):
-    tender = db.query(Tender).filter(Tender.id == tender_id).first()
-    if not tender:
-        raise HTTPException(status_code=404, detail="Tender not found")
-    return tender
+async def visible_tenders_query(db: AsyncSession, fields: tuple, username: str = None, service_type: str = None):
+    # Текущие версии тендеров, видимые пользователю: опубликованные и тендеры его организаций.
+    # Возвращает запрос и организации пользователя (часть ETag)
+    tenders_query = select(*columns(Tender, fields)).where(Tender.is_current)
 
+    if service_type:
+        validate_service_type(service_type)
+        tenders_query = tenders_query.where(Tender.service_type == service_type)
 
-def handle_exception(e: Exception):
-    print(f"Unexpected error: {e}")
-    raise HTTPException(status_code=500, detail="Internal Server Error")
+    if username is None:
+        return tenders_query.where(Tender.status == "PUBLISHED"), ()
 
+    user = await resolve_identity(username, db)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-def validate_tender_user_responsibility(username: str, tender_id: UUID, db: Session):
-    user = get_user_by_username(username, db)
-    tender = get_tender_by_id(tender_id, db)
-    check_user_responsibility(user.id, tender.organization_id, db)
-    return user, tender
+    tenders_query = tenders_query.where(
+        (Tender.status == "PUBLISHED") | Tender.organization_id.in_(user.organization_ids)
+    )
+    return tenders_query, user.organization_ids
 
 
 @router.get("/", response_model=list[TenderResponse])
-def get_tenders(
-        skip: int = 0,
-        limit: int = 100,
+async def get_tenders(
+        request: Request,
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = limit_query(100),
+        cursor: str = None,
         username: str = None,
         service_type: str = None,
-        db: Session = Depends(get_db)
+        q: str = None,
+        fields: str = None,
+        db: AsyncSession = Depends(get_read_db)
 ):
     try:
-        subquery = db.query(
-            Tender.tender_root_id, func.max(Tender.version).label("max_version")
-        ).group_by(Tender.tender_root_id).subquery()
-
-        tenders_query = (
-            db.query(Tender)
-            .join(subquery,
-                  (Tender.tender_root_id == subquery.c.tender_root_id) & (Tender.version == subquery.c.max_version))
-        )
+        fields = parse_fields(fields, TenderResponse)
+        tenders_query, visible_organizations = await visible_tenders_query(db, fields, username, service_type)
+        tenders_query, rank = search(Tender, tenders_query, q)
+
+        if username is None and public_tenders_cache.enabled:
+            # Анонимный список одинаков для всех клиентов — ответ берется из кэша. Страница вычисляется на первичном
+            # сервере: кэш сбрасывается сразу после записи, и отстающая реплика закэшировала бы прежние данные на весь TTL
+            async def compute_page():
+                page_headers = Response()
+                async with SessionLocal() as primary_db:
+                    page_headers.headers[ETAG_HEADER] = await list_etag(primary_db, request,
+                                                                        visible_events(TENDER, ()))
+                    tenders = await paginate(primary_db, tenders_query, Tender, page_headers, limit=limit,
+                                             cursor=cursor, skip=skip, rank=rank)
+                return json_list_response(TenderResponse, tenders, page_headers, fields)
+
+            page = await public_tenders_cache.get_or_compute((service_type, q, skip, limit, cursor, fields),
+                                                             compute_page)
+            return page.response(request)
+
+        cached = await not_modified(db, request, response, visible_events(TENDER, visible_organizations),
+                                    visible_organizations)
+        if cached:
+            return cached
+
+        tenders = await paginate(db, tenders_query, Tender, response, limit=limit, cursor=cursor, skip=skip,
+                                 rank=rank)
+        return json_list_response(TenderResponse, tenders, response, fields)
 
-        if service_type:
-            validate_service_type(service_type)
-            tenders_query = tenders_query.filter(Tender.service_type == service_type)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-        if username is None:
-            tenders_query = tenders_query.filter(Tender.status == "PUBLISHED")
-        else:
-            user = db.query(Employee).filter(Employee.username == username).first()
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-
-            tenders_query = tenders_query.filter(
-                (Tender.status == "PUBLISHED") | (
-                    db.query(OrganizationResponsible)
-                    .filter(
-                        OrganizationResponsible.user_id == user.id,
-                        OrganizationResponsible.organization_id == Tender.organization_id
-                    )
-                    .exists()
-                )
-            )
 
-        tenders = tenders_query.offset(skip).limit(limit).all()
-        return tenders
+@router.get("/export", response_class=StreamingResponse)
+async def export_tenders(
+        format: str = "ndjson",
+        username: str = None,
+        service_type: str = None,
+        fields: str = None,
+        session_factory=Depends(get_read_sessionmaker),
+        db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        check_export_format(format)
+        fields = parse_fields(fields, TenderResponse)
+        tenders_query, _ = await visible_tenders_query(db, fields, username, service_type)
+        tenders_query = tenders_query.order_by(Tender.created_at, Tender.id)
+        return export_response(tenders_query, TenderResponse, fields, format, "tenders", session_factory)
 
     except HTTPException as http_exc:
         raise http_exc
@@ -137,30 +164,36 @@ def get_tenders(
 
 
 @router.get("/my", response_model=list[TenderResponse])
-def get_user_tenders(
+async def get_user_tenders(
         username: str,
-        db: Session = Depends(get_db)
+        request: Request,
+        response: Response,
+        limit: int = limit_query(),
+        cursor: str = None,
+        q: str = None,
+        fields: str = None,
+        db: AsyncSession = Depends(get_read_db)
 ):
     try:
-        user = get_user_by_username(username, db)
-
-        subquery = db.query(
-            Tender.tender_root_id, func.max(Tender.version).label("max_version")
-        ).group_by(Tender.tender_root_id).subquery()
-
-        tenders = (
-            db.query(Tender)
-            .join(OrganizationResponsible, OrganizationResponsible.organization_id == Tender.organization_id)
-            .join(subquery,
-                  (Tender.tender_root_id == subquery.c.tender_root_id) & (Tender.version == subquery.c.max_version))
-            .filter(OrganizationResponsible.user_id == user.id)
-            .all()
+        fields = parse_fields(fields, TenderResponse)
+        user = await get_user_by_username(username, db)
+
+        tenders_query = select(*columns(Tender, fields)).where(
+            Tender.organization_id.in_(user.organization_ids),
+            Tender.is_current
         )
+        tenders_query, rank = search(Tender, tenders_query, q)
+        cached = await not_modified(db, request, response, visible_events(TENDER, user.organization_ids),
+                                    user.organization_ids)
+        if cached:
+            return cached
 
-        if not tenders:
+        tenders = await paginate(db, tenders_query, Tender, response, limit=limit, cursor=cursor, rank=rank)
+
+        if not tenders and not cursor:
             raise HTTPException(status_code=404, detail="No tenders found for this user")
 
-        return tenders
+        return json_list_response(TenderResponse, tenders, response, fields)
 
     except HTTPException as http_exc:
         raise http_exc
@@ -170,24 +203,17 @@ def get_user_tenders(
 
 
 @router.post("/new", response_model=TenderResponse)
-def create_tender(
+async def create_tender(
         tender: TenderCreate,
         username: str = None,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     try:
-        creator = get_user_by_username(username, db)
-
-        responsible = db.query(OrganizationResponsible).filter(
-            OrganizationResponsible.user_id == creator.id
-        ).first()
+        creator = await get_user_by_username(username, db)
 
-        if not responsible:
+        if not creator.organization_ids:
             raise HTTPException(status_code=403, detail="User is not responsible for any organization")
-
-        organization = db.query(Organization).filter(Organization.id == responsible.organization_id).first()
-        if not organization:
-            raise HTTPException(status_code=404, detail="Organization not found")
+        organization_id = creator.organization_ids[0]
 
         if not tender.title or not tender.description or not tender.service_type:
             raise HTTPException(status_code=400, detail="Title, description and service type are required")
@@ -198,20 +224,22 @@ def create_tender(
 
         new_tender = Tender(
             tender_root_id=uuid.uuid4(),
-            organization_id=organization.id,
+            organization_id=organization_id,
             title=tender.title,
             description=tender.description,
             status="CREATED",
             service_type=tender.service_type,
             creator_id=creator.id,
             version=1,
+            is_current=True,
             created_at=func.now(),
             updated_at=func.now()
         )
 
         db.add(new_tender)
-        db.commit()
-        db.refresh(new_tender)
+        await record_event(db, TENDER, "created", new_tender)
+        await db.commit()
+        await public_tenders_cache.invalidate()
         return new_tender
 
     except HTTPException as http_exc:
@@ -222,21 +250,29 @@ def create_tender(
 
 
 @router.patch("/{tender_id}/status", response_model=TenderResponse)
-def update_tender_status(
+async def update_tender_status(
         tender_id: UUID,
         new_status: str,
         username: str = None,
-        db: Session = Depends(get_db)
+        expected_version: int = None,
+        if_match: str = Header(None),
+        db: AsyncSession = Depends(get_db)
 ):
     try:
-        user, tender = validate_tender_user_responsibility(username, tender_id, db)
+        condition = precondition(if_match, expected_version)
+        user, tender = await validate_tender_user_responsibility(username, tender_id, db)
 
         if new_status not in ["PUBLISHED", "CLOSED"]:
             raise HTTPException(status_code=400, detail="Invalid status")
 
-        tender.status = new_status
-        db.commit()
-        db.refresh(tender)
+        condition.check(tender)
+        previous_status = tender.status
+        tender = await update_current(db, Tender, tender, status=new_status)
+        if tender is None:
+            condition.fail()
+        await record_event(db, TENDER, "status", tender, previous_status)
+        await db.commit()
+        await public_tenders_cache.invalidate()
         return tender
 
     except HTTPException as http_exc:
@@ -246,17 +282,20 @@ def update_tender_status(
 
 
 @router.patch("/{tender_id}/edit", response_model=TenderResponse)
-def update_tender(
+async def update_tender(
         tender_id: UUID,
         tender: TenderUpdate,
         username: str = None,
-        db: Session = Depends(get_db)
+        expected_version: int = None,
+        if_match: str = Header(None),
+        db: AsyncSession = Depends(get_db)
 ):
     if username is None:
         raise HTTPException(status_code=403, detail="Unauthorized users cannot edit tenders")
 
     try:
-        user, current_tender = validate_tender_user_responsibility(username, tender_id, db)
+        condition = precondition(if_match, expected_version)
+        user, current_tender = await validate_tender_user_responsibility(username, tender_id, db)
 
         if not tender.title or not tender.description:
             raise HTTPException(status_code=400, detail="Title and description are required")
@@ -269,22 +308,37 @@ def update_tender(
         for key, value in tender.dict(exclude_unset=True).items():
             new_tender_data[key] = value
 
-        new_tender = Tender(
-            tender_root_id=current_tender.tender_root_id,
-            organization_id=current_tender.organization_id,
-            title=new_tender_data["title"],
-            description=new_tender_data["description"],
-            status=new_tender_data["status"],
-            service_type=new_tender_data.get("service_type", current_tender.service_type),
-            version=current_tender.version + 1,
-            creator_id=current_tender.creator_id,
-            created_at=current_tender.created_at,
-            updated_at=func.now()
-        )
+        condition.check(current_tender)
+        previous_status = current_tender.status
+        if VERSION_STORAGE == "delta":
+            new_tender = await tender_history.apply(db, current_tender, {
+                "title": new_tender_data["title"],
+                "description": new_tender_data["description"],
+                "status": new_tender_data["status"],
+                "service_type": new_tender_data.get("service_type", current_tender.service_type)
+            })
+            if new_tender is None:
+                condition.fail()
+        else:
+            new_tender = Tender(
+                tender_root_id=current_tender.tender_root_id,
+                organization_id=current_tender.organization_id,
+                title=new_tender_data["title"],
+                description=new_tender_data["description"],
+                status=new_tender_data["status"],
+                service_type=new_tender_data.get("service_type", current_tender.service_type),
+                version=current_tender.version + 1,
+                creator_id=current_tender.creator_id,
+                created_at=current_tender.created_at,
+                updated_at=func.now()
+            )
 
-        db.add(new_tender)
-        db.commit()
-        db.refresh(new_tender)
+            if not await mark_tender_versions_outdated(current_tender, db):
+                condition.fail()
+            db.add(new_tender)
+        await record_event(db, TENDER, "edited", new_tender, previous_status)
+        await db.commit()
+        await public_tenders_cache.invalidate()
 
         return new_tender
 
@@ -296,39 +350,51 @@ def update_tender(
 
 
 @router.put("/{tender_id}/rollback/{version}", response_model=TenderResponse)
-def rollback_tender(
+async def rollback_tender(
         tender_id: UUID,
         version: int,
         username: str = None,
-        db: Session = Depends(get_db)
+        expected_version: int = None,
+        if_match: str = Header(None),
+        db: AsyncSession = Depends(get_db)
 ):
     try:
-        user, current_tender = validate_tender_user_responsibility(username, tender_id, db)
+        condition = precondition(if_match, expected_version)
+        user, current_tender = await validate_tender_user_responsibility(username, tender_id, db)
 
-        rollback_version = db.query(Tender).filter(
-            Tender.tender_root_id == current_tender.tender_root_id,
-            Tender.version == version
-        ).first()
+        rollback_version = await tender_history.version(db, current_tender.tender_root_id, version)
 
         if not rollback_version:
             raise HTTPException(status_code=404, detail="Version not found for the tender")
 
-        new_tender = Tender(
-            tender_root_id=current_tender.tender_root_id,
-            organization_id=rollback_version.organization_id,
-            title=rollback_version.title,
-            description=rollback_version.description,
-            status=rollback_version.status,
-            service_type=rollback_version.service_type,
-            version=current_tender.version + 1,
-            creator_id=rollback_version.creator_id,
-            created_at=current_tender.created_at,
-            updated_at=func.now()
-        )
+        condition.check(current_tender)
+        previous_status = current_tender.status
+        if VERSION_STORAGE == "delta":
+            new_tender = await tender_history.apply(db, current_tender, {
+                field: rollback_version[field] for field in ("title", "description", "status", "service_type")
+            })
+            if new_tender is None:
+                condition.fail()
+        else:
+            new_tender = Tender(
+                tender_root_id=current_tender.tender_root_id,
+                organization_id=rollback_version["organization_id"],
+                title=rollback_version["title"],
+                description=rollback_version["description"],
+                status=rollback_version["status"],
+                service_type=rollback_version["service_type"],
+                version=current_tender.version + 1,
+                creator_id=rollback_version["creator_id"],
+                created_at=current_tender.created_at,
+                updated_at=func.now()
+            )
 
-        db.add(new_tender)
-        db.commit()
-        db.refresh(new_tender)
+            if not await mark_tender_versions_outdated(current_tender, db):
+                condition.fail()
+            db.add(new_tender)
+        await record_event(db, TENDER, "rolled_back", new_tender, previous_status)
+        await db.commit()
+        await public_tenders_cache.invalidate()
 
         return new_tender
 
@@ -336,3 +402,30 @@ def rollback_tender(
         raise http_exc
     except Exception as e:
         handle_exception(e)
+
+
+@router.get("/{tender_id}/versions", response_model=list[TenderResponse])
+async def get_tender_versions(
+        tender_id: UUID,
+        response: Response,
+        limit: int = limit_query(20),
+        cursor: int = None,
+        username: str = None,
+        db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        user, tender = await validate_tender_user_responsibility(username, tender_id, db)
+
+        # От новых версий к старым; cursor — номер версии, после которой продолжить
+        limit = page_limit(limit)
+        versions = await tender_history.versions(db, tender.tender_root_id, cursor, limit + 1 if limit else None)
+        if limit and len(versions) > limit:
+            versions = versions[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = str(versions[-1]["version"])
+
+        return json_list_response(TenderResponse, versions, response)
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        handle_exception(e)
@@ -44,6 +44,36 @@ class BidResponse(BidBase):
         orm_mode = True
 
 
+class BidVersionResponse(BidBase):
+    id: UUID
+    tender_id: UUID
+    bid_root_id: UUID
+    organization_id: UUID
+    creator_id: UUID
+    status: str
+    quorum: Optional[int]
+    created_at: datetime
+    updated_at: datetime
+    version: int
+
+
+class BidStatusUpdate(BaseModel):
+    bid_id: UUID
+    new_status: str
+
+
+class BidBulkResult(BaseModel):
+    index: int
+    status_code: int
+    detail: Optional[str] = None
+    bid: Optional[BidResponse] = None
+
+
+class BidBulkResponse(BaseModel):
+    applied: bool
+    results: list[BidBulkResult]
+
+
 class ReviewResponse(BaseModel):
     id: UUID
     bid_id: UUID
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 
 class OrganizationResponse(BaseModel):
@@ -38,3 +38,40 @@ class TenderByCompanyResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class PoolStatsResponse(BaseModel):
+    pid: int
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    timeout: float
+    checkouts: int
+    timeouts: int
+    wait_time_total_ms: float
+    wait_time_avg_ms: float
+    wait_time_max_ms: float
+    wait_time_recent_ms: float
+
+
+class AdmissionStatsResponse(BaseModel):
+    max_concurrency: int
+    user_concurrency: int
+    priority_reserve: int
+    in_flight: int
+    queued: Dict[str, int]
+    users: int
+    rejected: Dict[str, int]
+    pool_wait_recent_ms: float
+
+
+class SlowQueryResponse(BaseModel):
+    at: datetime
+    duration_ms: float
+    sql: str
+    parameters: Any
+    route: Optional[str]
+    handler: Optional[str]
+    plan: Optional[str]
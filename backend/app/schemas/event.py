@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import Optional
+
+
+class ChangeEventResponse(BaseModel):
+    id: str  # курсор события
+    entity: str  # "tender" или "bid"
+    action: str
+    entity_id: UUID
+    root_id: UUID
+    version: int
+    status: str
+    previous_status: Optional[str]
+    tender_id: UUID
+    organization_id: UUID
+    created_at: datetime
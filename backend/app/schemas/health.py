@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional
+
+from backend.app.schemas.debug import PoolStatsResponse
+
+
+class DatabaseHealthResponse(BaseModel):
+    status: str
+    latency_ms: float
+    error: Optional[str]
+    pool: PoolStatsResponse
+
+
+class HealthResponse(BaseModel):
+    status: str
+    pid: int
+    draining: bool
+    database: Optional[DatabaseHealthResponse] = None
+    replica: Optional[DatabaseHealthResponse] = None
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select, func
+
+# Та же конфигурация, что и в SEARCH_VECTOR (models/base.py): без стемминга, одинаково для любых языков
+SEARCH_CONFIG = "simple"
+
+MAX_QUERY_LENGTH = 200
+
+
+def search(model, query: Select, q: Optional[str]):
+    # q — поисковая строка в синтаксисе websearch_to_tsquery: слова, "фраза", -исключение, or.
+    # Возвращает запрос с условием по GIN-индексу и столбцом rank и выражение ранга; без q — (query, None)
+    if q is None or not q.strip():
+        return query, None
+    if len(q) > MAX_QUERY_LENGTH:
+        raise HTTPException(status_code=422, detail=f"Search query must not exceed {MAX_QUERY_LENGTH} characters")
+
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(model.search_vector, tsquery)
+    return query.where(model.search_vector.op("@@")(tsquery)).add_columns(rank.label("rank")), rank
@@ -0,0 +1,39 @@
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Response
+from pydantic import ConfigDict, TypeAdapter, create_model
+
+
+@lru_cache(maxsize=None)
+def partial_model(model, fields: tuple):
+    # Схема ответа, сокращенная до запрошенных полей (параметр fields=); порядок полей как в исходной схеме
+    return create_model(model.__name__, __config__=ConfigDict(from_attributes=True),
+                        **{name: (model.model_fields[name].annotation, model.model_fields[name])
+                           for name in fields})
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+
+def json_list_response(model, items, response: Response = None,
+                       fields: Optional[tuple] = None) -> JSONBytesResponse:
+    # Списки валидируются из ORM-объектов, строк Row или словарей один раз и кодируются в JSON на стороне
+    # pydantic-core, минуя повторную валидацию response_model и jsonable_encoder. Схема OpenAPI по-прежнему
+    # берется из response_model маршрута. Заголовки, выставленные обработчиком (X-Next-Cursor), переносятся в ответ
+    if fields is not None and fields != tuple(model.model_fields):
+        model = partial_model(model, fields)
+    adapter = list_adapter(model)
+    body = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    result = JSONBytesResponse(body)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name != "content-length":
+                result.headers[name] = value
+    return result
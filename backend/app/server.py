@@ -0,0 +1,39 @@
+import asyncio
+import importlib.util
+import os
+
+import uvicorn
+
+from backend.app.config import host, port, RUN_MIGRATIONS, WEB_CONCURRENCY, GRACEFUL_SHUTDOWN_TIMEOUT
+
+
+def worker_count() -> int:
+    return WEB_CONCURRENCY if WEB_CONCURRENCY > 0 else os.cpu_count() or 1
+
+
+async def migrate():
+    from backend.app.database import engine, init_db
+
+    try:
+        await init_db()
+    finally:
+        await engine.dispose()
+
+
+def main():
+    workers = worker_count()
+    # Миграции применяются один раз до запуска воркеров, воркеры стартуют без них
+    if RUN_MIGRATIONS and workers > 1:
+        asyncio.run(migrate())
+        os.environ["RUN_MIGRATIONS"] = "false"
+
+    # uvloop и httptools используются, если установлены (uvicorn[standard])
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    print(f"Starting {workers} worker(s), event loop: {loop}, HTTP parser: {http}")
+    uvicorn.run("backend.app.main:create_app", factory=True, host=host, port=int(port), workers=workers,
+                loop=loop, http=http, timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT, proxy_headers=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import re
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.app.config import SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_EXPLAIN, SLOW_QUERY_EXPLAIN_INTERVAL, \
+    SLOW_QUERY_LOG_SIZE
+from backend.app.metrics import current_scope, route_template
+
+# Ограничение на время EXPLAIN ANALYZE, чтобы разбор не нагружал базу сильнее исходного запроса
+EXPLAIN_STATEMENT_TIMEOUT_MS = 10000
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w$.])\d+(?:\.\d+)?\b")
+PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")
+PLACEHOLDER_LIST = re.compile(r"\((?:\$\?, )+\$\?\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    # Одинаковые запросы с разными значениями и длиной списков IN сводятся к одной строке
+    sql = WHITESPACE.sub(" ", statement).strip()
+    sql = STRING_LITERAL.sub("'?'", sql)
+    sql = NUMBER_LITERAL.sub("?", sql)
+    sql = PLACEHOLDER.sub("$?", sql)
+    return PLACEHOLDER_LIST.sub("($?, ...)", sql)
+
+
+def parameter_shape(value):
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameters_shape(parameters, executemany: bool):
+    # Значения параметров в журнал не попадают — только типы
+    if executemany:
+        rows = list(parameters)
+        return {"rows": len(rows), "shape": parameters_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: parameter_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [parameter_shape(value) for value in parameters]
+    return parameter_shape(parameters)
+
+
+def explain_options(statement: str):
+    # ANALYZE выполняет запрос, поэтому только для чтения без блокировок; изменения разбираются без выполнения.
+    # DDL и служебные команды не разбираются
+    head = statement.lstrip().upper()
+    if not head.startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+        return None
+    if head.startswith(("SELECT", "WITH")) and "FOR UPDATE" not in head and "FOR SHARE" not in head \
+            and not re.search(r"\b(INSERT|UPDATE|DELETE)\b", head):
+        return "ANALYZE, BUFFERS"
+    return "BUFFERS"
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, explain: bool, explain_interval: float, size: int):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.entries = deque(maxlen=size)
+        self._engine = None
+        self._explained = {}
+        self._tasks = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def install(self, engine: AsyncEngine):
+        if not self.enabled:
+            return
+        # EXPLAIN выполняется на первом подключенном движке (первичном сервере), в том числе для запросов к реплике
+        self._engine = self._engine or engine
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context.slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "slow_query_started", None)
+        if started is None or context.execution_options.get("slow_query_explain"):
+            return
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            self.record(statement, parameters, executemany, duration)
+
+    def record(self, statement: str, parameters, executemany: bool, duration: float):
+        scope = current_scope.get()
+        endpoint = scope.get("endpoint") if scope else None
+        sql = normalize_sql(statement)
+        entry = {
+            "at": datetime.now().isoformat(),
+            "duration_ms": round(duration * 1000, 2),
+            "sql": sql,
+            "parameters": parameters_shape(parameters, executemany),
+            "route": f"{scope['method']} {route_template(scope)}" if scope else None,
+            "handler": f"{endpoint.__module__}.{endpoint.__qualname__}" if endpoint else None,
+            "plan": None
+        }
+        self.entries.append(entry)
+
+        options = explain_options(statement)
+        if self.explain and options and not executemany and self._should_explain(sql):
+            try:
+                task = asyncio.get_running_loop().create_task(self._explain(entry, options, statement, parameters))
+            except RuntimeError:
+                self._print(entry)
+                return
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self._print(entry)
+
+    def _should_explain(self, sql: str) -> bool:
+        # Один план на нормализованный запрос за интервал — всплеск медленных запросов не порождает шторм EXPLAIN
+        now = time.monotonic()
+        last = self._explained.get(sql)
+        if last is not None and now - last < self.explain_interval:
+            return False
+        self._explained[sql] = now
+        if len(self._explained) > self.entries.maxlen * 10:
+            self._explained = {key: value for key, value in self._explained.items()
+                               if now - value < self.explain_interval}
+        return True
+
+    async def _explain(self, entry: dict, options: str, statement: str, parameters):
+        try:
+            async with self._engine.connect() as connection:
+                connection = await connection.execution_options(slow_query_explain=True)
+                async with connection.begin() as transaction:
+                    await connection.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_STATEMENT_TIMEOUT_MS}")
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN ({options}) {statement}", parameters)
+                    entry["plan"] = "\n".join(row[0] for row in result)
+                    # Разбор никогда не фиксирует изменения
+                    await transaction.rollback()
+        except Exception as e:
+            entry["plan"] = f"EXPLAIN failed: {e}"
+        self._print(entry)
+
+    def _print(self, entry: dict):
+        print(f"Slow query: {json.dumps(entry, ensure_ascii=False)}")
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_EXPLAIN, SLOW_QUERY_EXPLAIN_INTERVAL,
+                              SLOW_QUERY_LOG_SIZE)
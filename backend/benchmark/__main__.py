@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import json
+import subprocess
+from datetime import datetime
+
+import httpx
+
+from backend.app.database import engine
+from backend.app.main import app
+from backend.benchmark.runner import SCENARIOS, install_query_counter, run_scenario
+from backend.benchmark.seed import SeedConfig, seed, clear
+
+
+def parse_args():
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmark",
+                                     description="Нагрузочный тест маршрутов тендеров и предложений")
+    parser.add_argument("--organizations", type=int, default=defaults.organizations)
+    parser.add_argument("--employees", type=int, default=defaults.employees,
+                        help="ответственных на организацию")
+    parser.add_argument("--tenders", type=int, default=defaults.tenders, help="тендеров на организацию")
+    parser.add_argument("--versions", type=int, default=defaults.versions,
+                        help="версий у каждого тендера и предложения")
+    parser.add_argument("--bids", type=int, default=defaults.bids, help="предложений на тендер")
+    parser.add_argument("--decisions", type=int, default=defaults.decisions,
+                        help="решений на предложение")
+    parser.add_argument("--reviews", type=int, default=defaults.reviews, help="отзывов на предложение")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий и уровень параллелизма")
+    parser.add_argument("--concurrency", default="1,8,32", help="уровни параллелизма через запятую")
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=sorted(SCENARIOS),
+                        help="запустить только указанные сценарии (можно несколько раз)")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения p95")
+    parser.add_argument("--keep", action="store_true", help="не удалять синтетические данные после прогона")
+    return parser.parse_args()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: dict, baseline: dict = None):
+    print(f"{'scenario':<52}{'conc':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>7}{'err':>6}")
+    for name, levels in results.items():
+        for concurrency, result in levels.items():
+            latency = result["latency_ms"]
+            line = f"{name:<52}{concurrency:>5}{result['throughput_rps']:>9.1f}{latency['p50']:>9.2f}" \
+                   f"{latency['p95']:>9.2f}{latency['p99']:>9.2f}" \
+                   f"{result['queries_per_request']['mean']:>7.1f}{result['errors']:>6}"
+            previous = (baseline or {}).get(name, {}).get(concurrency)
+            if previous and previous["latency_ms"]["p95"]:
+                change = latency["p95"] / previous["latency_ms"]["p95"] - 1
+                line += f"  p95 {change:+.0%}"
+            print(line)
+
+
+async def main(args):
+    config = SeedConfig(args.organizations, args.employees, args.tenders, args.versions,
+                        args.bids, args.decisions, args.reviews, args.seed)
+    levels = [int(level) for level in args.concurrency.split(",")]
+    scenarios = args.scenarios or list(SCENARIOS)
+
+    install_query_counter(engine)
+    try:
+        # Обработчики startup/shutdown приложения: миграции, прогрев пула, LISTEN
+        async with app.router.lifespan_context(app):
+            data = await seed(engine, config)
+            print(f"Seeded {len(data.users)} users, {len(data.tenders)} tenders, {len(data.bids)} bids "
+                  f"({config.versions} versions each)")
+
+            results = {}
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                for name in scenarios:
+                    results[name] = {}
+                    for concurrency in levels:
+                        results[name][str(concurrency)] = await run_scenario(
+                            client, data, name, args.requests, concurrency, args.seed)
+            if not args.keep:
+                await clear(engine)
+    finally:
+        await engine.dispose()
+
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now().isoformat(),
+        "seed": config._asdict(),
+        "requests": args.requests,
+        "concurrency": levels,
+        "results": results
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as previous:
+            baseline = json.load(previous)["results"]
+    print_results(results, baseline)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,258 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import NamedTuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.benchmark.seed import Dataset
+
+# Счетчик SQL-запросов текущего запроса к API; список, чтобы его видели и копии контекста
+query_count: ContextVar = ContextVar("benchmark_query_count", default=None)
+
+SCENARIOS = {}
+
+
+def count_queries(conn, cursor, statement, parameters, context, executemany):
+    counter = query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def install_query_counter(engine: AsyncEngine):
+    if not event.contains(engine.sync_engine, "before_cursor_execute", count_queries):
+        event.listen(engine.sync_engine, "before_cursor_execute", count_queries)
+
+
+class Worker(NamedTuple):
+    index: int
+    concurrency: int
+    rng: random.Random
+
+    def choice(self, items: list):
+        return self.rng.choice(items)
+
+    def own(self, items: list) -> int:
+        # Изменяющие сценарии работают только со своей долей объектов,
+        # чтобы параллельные воркеры не создавали одну и ту же версию
+        owned = range(self.index, len(items), self.concurrency)
+        return self.rng.choice(owned) if owned else self.rng.randrange(len(items))
+
+
+def scenario(name: str):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+@scenario("GET /api/tenders/")
+async def list_tenders(client, data: Dataset, worker: Worker):
+    user = worker.choice(data.users)
+    return await client.get("/api/tenders/", params={"username": user.username, "limit": 20})
+
+
+@scenario("GET /api/tenders/ anonymous")
+async def list_published_tenders(client, data: Dataset, worker: Worker):
+    return await client.get("/api/tenders/", params={"limit": 20})
+
+
+@scenario("GET /api/tenders/my")
+async def list_user_tenders(client, data: Dataset, worker: Worker):
+    user = worker.choice(data.users)
+    return await client.get("/api/tenders/my", params={"username": user.username, "limit": 20})
+
+
+@scenario("POST /api/tenders/new")
+async def create_tender(client, data: Dataset, worker: Worker):
+    user = worker.choice(data.users)
+    return await client.post("/api/tenders/new", params={"username": user.username}, json={
+        "title": "Benchmark tender",
+        "description": "Created by benchmark",
+        "service_type": "IT Services"
+    })
+
+
+@scenario("PATCH /api/tenders/{tender_id}/status")
+async def update_tender_status(client, data: Dataset, worker: Worker):
+    tender = data.tenders[worker.own(data.tenders)]
+    user = worker.choice(data.responsible(tender.organization))
+    return await client.patch(f"/api/tenders/{tender.id}/status", params={
+        "username": user.username, "new_status": worker.choice(["PUBLISHED", "CLOSED"])
+    })
+
+
+@scenario("PATCH /api/tenders/{tender_id}/edit")
+async def edit_tender(client, data: Dataset, worker: Worker):
+    index = worker.own(data.tenders)
+    tender = data.tenders[index]
+    user = worker.choice(data.responsible(tender.organization))
+    response = await client.patch(f"/api/tenders/{tender.id}/edit", params={"username": user.username}, json={
+        "title": "Benchmark edit",
+        "description": "Edited by benchmark"
+    })
+    if response.status_code == 200:
+        data.tenders[index] = tender._replace(id=response.json()["id"], version=tender.version + 1)
+    return response
+
+
+@scenario("PUT /api/tenders/{tender_id}/rollback/{version}")
+async def rollback_tender(client, data: Dataset, worker: Worker):
+    index = worker.own(data.tenders)
+    tender = data.tenders[index]
+    user = worker.choice(data.responsible(tender.organization))
+    version = worker.rng.randint(1, tender.version)
+    response = await client.put(f"/api/tenders/{tender.id}/rollback/{version}",
+                                params={"username": user.username})
+    if response.status_code == 200:
+        data.tenders[index] = tender._replace(id=response.json()["id"], version=tender.version + 1)
+    return response
+
+
+@scenario("GET /api/bids/")
+async def list_bids(client, data: Dataset, worker: Worker):
+    user = worker.choice(data.users)
+    return await client.get("/api/bids/", params={"username": user.username, "limit": 20})
+
+
+@scenario("GET /api/bids/my")
+async def list_user_bids(client, data: Dataset, worker: Worker):
+    bid = worker.choice(data.bids)
+    return await client.get("/api/bids/my", params={"username": bid.creator, "limit": 20})
+
+
+@scenario("GET /api/bids/{tender_id}/list")
+async def list_tender_bids(client, data: Dataset, worker: Worker):
+    # Список по исходной версии тендера, к которой привязаны засеянные предложения
+    bid = worker.choice(data.bids)
+    user = worker.choice(data.responsible(bid.tender_organization))
+    return await client.get(f"/api/bids/{bid.tender_id}/list", params={"username": user.username, "limit": 20})
+
+
+@scenario("POST /api/bids/new")
+async def create_bid(client, data: Dataset, worker: Worker):
+    bid = worker.choice(data.bids)
+    return await client.post("/api/bids/new", params={"username": bid.creator}, json={
+        "tender_id": str(bid.tender_id),
+        "amount": 1000,
+        "title": "Benchmark bid",
+        "description": "Created by benchmark"
+    })
+
+
+@scenario("PATCH /api/bids/{bid_id}/status")
+async def update_bid_status(client, data: Dataset, worker: Worker):
+    bid = data.bids[worker.own(data.bids)]
+    return await client.patch(f"/api/bids/{bid.id}/status", params={
+        "username": bid.creator, "new_status": "PUBLISHED"
+    })
+
+
+@scenario("PATCH /api/bids/{bid_id}/edit")
+async def edit_bid(client, data: Dataset, worker: Worker):
+    index = worker.own(data.bids)
+    bid = data.bids[index]
+    response = await client.patch(f"/api/bids/{bid.id}/edit", params={"username": bid.creator}, json={
+        "amount": worker.rng.randint(1000, 1000000),
+        "title": "Benchmark edit",
+        "description": "Edited by benchmark"
+    })
+    if response.status_code == 200:
+        data.bids[index] = bid._replace(id=response.json()["id"], version=bid.version + 1)
+    return response
+
+
+@scenario("PUT /api/bids/{bid_id}/rollback/{version}")
+async def rollback_bid(client, data: Dataset, worker: Worker):
+    index = worker.own(data.bids)
+    bid = data.bids[index]
+    version = worker.rng.randint(1, bid.version)
+    response = await client.put(f"/api/bids/{bid.id}/rollback/{version}", params={"username": bid.creator})
+    if response.status_code == 200:
+        data.bids[index] = bid._replace(id=response.json()["id"], version=bid.version + 1)
+    return response
+
+
+@scenario("POST /api/bids/submit_decision")
+async def submit_decision(client, data: Dataset, worker: Worker):
+    bid = data.bids[worker.own(data.bids)]
+    user = worker.choice(data.responsible(bid.tender_organization))
+    return await client.post("/api/bids/submit_decision", params={
+        "username": user.username, "bid_id": str(bid.id), "decision": worker.choice(["APPROVED", "REJECTED"])
+    })
+
+
+@scenario("GET /api/bids/{bid_id}/reviews")
+async def list_reviews(client, data: Dataset, worker: Worker):
+    bid = worker.choice(data.bids)
+    user = worker.choice(data.responsible(bid.tender_organization))
+    return await client.get(f"/api/bids/{bid.id}/reviews", params={
+        "username": user.username, "authorUsername": bid.creator
+    })
+
+
+@scenario("POST /api/bids/feedback")
+async def create_review(client, data: Dataset, worker: Worker):
+    bid = worker.choice(data.bids)
+    user = worker.choice(data.responsible(bid.tender_organization))
+    return await client.post("/api/bids/feedback", params={
+        "username": user.username, "bid_id": str(bid.id), "authorUsername": bid.creator
+    }, json={"content": "Benchmark review", "rating": worker.rng.randint(1, 5)})
+
+
+def percentile(values: list, fraction: float) -> float:
+    # Nearest-rank по отсортированному списку
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+def summarize(latencies: list, queries: list, statuses: Counter, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "max": latencies[-1] if latencies else 0.0
+        },
+        "queries_per_request": {
+            "mean": sum(queries) / len(queries) if queries else 0.0,
+            "max": max(queries) if queries else 0
+        }
+    }
+
+
+async def run_scenario(client, data: Dataset, name: str, requests: int, concurrency: int, seed: int) -> dict:
+    func = SCENARIOS[name]
+    latencies, queries, statuses = [], [], Counter()
+    remaining = [requests]
+
+    async def work(worker: Worker):
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            counter = [0]
+            token = query_count.set(counter)
+            started = time.perf_counter()
+            try:
+                response = await func(client, data, worker)
+            finally:
+                query_count.reset(token)
+            latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(counter[0])
+            statuses[response.status_code] += 1
+
+    workers = [Worker(index, concurrency, random.Random(f"{seed}:{name}:{index}")) for index in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*(work(worker) for worker in workers))
+    return summarize(latencies, queries, statuses, time.perf_counter() - started)
@@ -0,0 +1,189 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.app.models import Employee, Organization, OrganizationResponsible, Tender, Bid
+from backend.app.models.bid import BidDecision, Review
+
+# Синтетические данные помечаются префиксами и удаляются перед повторным засевом
+USERNAME_PREFIX = "bench_"
+ORGANIZATION_PREFIX = "bench-"
+
+SERVICE_TYPES = ["Construction", "IT Services", "Consulting"]
+ORGANIZATION_TYPES = ["IE", "LLC", "JSC"]
+
+# Размер пачки для executemany
+BATCH_SIZE = 1000
+
+
+class SeedConfig(NamedTuple):
+    organizations: int = 10
+    employees: int = 3  # ответственных на организацию
+    tenders: int = 20  # на организацию
+    versions: int = 5  # версий у каждого тендера и предложения
+    bids: int = 5  # на тендер
+    decisions: int = 2  # на опубликованное предложение, меньше кворума
+    reviews: int = 1  # на предложение
+    seed: int = 42
+
+
+class SeededUser(NamedTuple):
+    id: UUID
+    username: str
+    organization: int
+
+
+class SeededTender(NamedTuple):
+    id: UUID
+    organization: int
+    version: int
+
+
+class SeededBid(NamedTuple):
+    id: UUID
+    tender_id: UUID
+    tender_organization: int
+    organization: int
+    creator: str
+    version: int
+
+
+class Dataset(NamedTuple):
+    users: list
+    tenders: list
+    bids: list
+    organizations: int
+
+    def responsible(self, organization: int):
+        return [user for user in self.users if user.organization == organization]
+
+
+async def clear(engine: AsyncEngine):
+    # Каскадные внешние ключи удаляют тендеры, предложения, решения и отзывы
+    async with engine.begin() as connection:
+        await connection.execute(delete(Employee).where(Employee.username.startswith(USERNAME_PREFIX)))
+        await connection.execute(delete(Organization).where(Organization.name.startswith(ORGANIZATION_PREFIX)))
+
+
+async def insert_rows(connection, model, rows: list):
+    for start in range(0, len(rows), BATCH_SIZE):
+        await connection.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def other_organization(rng: random.Random, organization: int, organizations: int) -> Optional[int]:
+    if organizations < 2:
+        return None
+    other = rng.randrange(organizations - 1)
+    return other if other < organization else other + 1
+
+
+async def seed(engine: AsyncEngine, config: SeedConfig) -> Dataset:
+    rng = random.Random(config.seed)
+    # Отметки времени растут с каждой строкой, чтобы страницы курсорной пагинации различались
+    clock = [datetime.now() - timedelta(days=30)]
+
+    def tick():
+        clock[0] += timedelta(milliseconds=rng.randint(1, 1000))
+        return clock[0]
+
+    organizations, employees, responsibles = [], [], []
+    users = []
+    for org_index in range(config.organizations):
+        organization_id = uuid.uuid4()
+        organizations.append({
+            "id": organization_id,
+            "name": f"{ORGANIZATION_PREFIX}{org_index}",
+            "description": "Synthetic benchmark organization",
+            "type": rng.choice(ORGANIZATION_TYPES)
+        })
+        for employee_index in range(config.employees):
+            user = SeededUser(uuid.uuid4(), f"{USERNAME_PREFIX}{org_index}_{employee_index}", org_index)
+            users.append(user)
+            employees.append({"id": user.id, "username": user.username,
+                              "first_name": "Bench", "last_name": str(employee_index)})
+            responsibles.append({"id": uuid.uuid4(), "organization_id": organization_id, "user_id": user.id})
+
+    by_organization = {}
+    for user in users:
+        by_organization.setdefault(user.organization, []).append(user)
+
+    tender_rows, tenders = [], []
+    for org_index in range(config.organizations):
+        for tender_index in range(config.tenders):
+            root_id = uuid.uuid4()
+            created_at = tick()
+            for version in range(1, config.versions + 1):
+                row_id = uuid.uuid4()
+                tender_rows.append({
+                    "id": row_id,
+                    "tender_root_id": root_id,
+                    "title": f"Tender {org_index}-{tender_index} v{version}",
+                    "description": "Synthetic benchmark tender",
+                    "status": "PUBLISHED" if version > 1 or tender_index % 4 else "CREATED",
+                    "service_type": rng.choice(SERVICE_TYPES),
+                    "organization_id": organizations[org_index]["id"],
+                    "creator_id": rng.choice(by_organization[org_index]).id,
+                    "version": version,
+                    "is_current": version == config.versions,
+                    "created_at": created_at,
+                    "updated_at": tick()
+                })
+            tenders.append(SeededTender(row_id, org_index, config.versions))
+
+    bid_rows, decision_rows, review_rows, bids = [], [], [], []
+    quorum = min(3, config.employees)
+    for tender_index, tender in enumerate(tenders):
+        for _ in range(config.bids):
+            org_index = other_organization(rng, tender.organization, config.organizations)
+            if org_index is None:
+                break
+            creator = rng.choice(by_organization[org_index])
+            root_id = uuid.uuid4()
+            created_at = tick()
+            approvals = min(config.decisions, quorum - 1)
+            for version in range(1, config.versions + 1):
+                row_id = uuid.uuid4()
+                bid_rows.append({
+                    "id": row_id,
+                    "bid_root_id": root_id,
+                    "amount": rng.randint(1000, 1000000),
+                    "title": f"Bid {tender_index} v{version}",
+                    "description": "Synthetic benchmark bid",
+                    "status": "PUBLISHED",
+                    "tender_id": tender.id,
+                    "organization_id": organizations[org_index]["id"],
+                    "creator_id": creator.id,
+                    "version": version,
+                    "is_current": version == config.versions,
+                    "quorum": quorum,
+                    "approvals": approvals if version == config.versions else 0,
+                    "created_at": created_at,
+                    "updated_at": tick()
+                })
+            bids.append(SeededBid(row_id, tender.id, tender.organization, org_index, creator.username, config.versions))
+
+            reviewers = by_organization[tender.organization]
+            for user in reviewers[:approvals]:
+                decision_rows.append({"id": uuid.uuid4(), "bid_id": row_id, "user_id": user.id,
+                                      "decision": "APPROVED", "decision_date": tick()})
+            for _ in range(config.reviews):
+                review_rows.append({"id": uuid.uuid4(), "bid_id": row_id, "reviewer_id": rng.choice(reviewers).id,
+                                    "author_id": creator.id, "content": "Synthetic benchmark review",
+                                    "rating": rng.randint(1, 5), "created_at": tick()})
+
+    await clear(engine)
+    async with engine.begin() as connection:
+        await insert_rows(connection, Organization, organizations)
+        await insert_rows(connection, Employee, employees)
+        await insert_rows(connection, OrganizationResponsible, responsibles)
+        await insert_rows(connection, Tender, tender_rows)
+        await insert_rows(connection, Bid, bid_rows)
+        await insert_rows(connection, BidDecision, decision_rows)
+        await insert_rows(connection, Review, review_rows)
+
+    return Dataset(users, tenders, bids, config.organizations)
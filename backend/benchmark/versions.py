@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import httpx
+from sqlalchemy import select
+
+from backend.app.database import engine
+from backend.app.main import app
+from backend.app.models import Bid
+from backend.benchmark.seed import SeedConfig, seed, clear
+
+STORAGES = ("rows", "delta")
+# Поля версии, которые определяются только операциями: без id и отметок времени. decisions сравниваются
+# значениями решений, approvals — счетчик одобрений текущей строки предложения из базы
+COMPARED_FIELDS = ("version", "title", "description", "status", "service_type", "amount", "quorum", "approvals",
+                   "decisions")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmark.versions",
+                                     description="Сравнение истории версий в режимах VERSION_STORAGE=rows и delta")
+    parser.add_argument("--storage", choices=STORAGES, help="прогнать операции в текущем режиме и вывести JSON")
+    return parser.parse_args()
+
+
+async def call(request) -> dict:
+    response = await request
+    response.raise_for_status()
+    return response.json()
+
+
+def normalize(versions: list) -> list:
+    result = [{field: version.get(field) for field in COMPARED_FIELDS} for version in versions]
+    for version in result:
+        if version["decisions"] is not None:
+            version["decisions"] = sorted(decision["decision"] for decision in version["decisions"])
+    return result
+
+
+async def with_approvals(bid: dict) -> dict:
+    async with engine.connect() as connection:
+        approvals = await connection.scalar(select(Bid.approvals).where(Bid.id == bid["id"]))
+    return {**bid, "approvals": approvals}
+
+
+async def decide(client: httpx.AsyncClient, user: dict, bid: dict, decision: str) -> list:
+    # Код ответа сравнивается, а не проверяется: повторный голос после правки должен пройти в обоих режимах
+    response = await client.post("/api/bids/submit_decision", params={**user, "bid_id": bid["id"], "decision": decision})
+    return [response.status_code, response.json()]
+
+
+async def paged_versions(client: httpx.AsyncClient, path: str, params: dict) -> list:
+    # История по одной версии на страницу через X-Next-Cursor
+    versions, cursor = [], None
+    while True:
+        page_params = {**params, "limit": 1, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(path, params=page_params)
+        response.raise_for_status()
+        versions += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return versions
+
+
+async def approvals(client: httpx.AsyncClient, owners: list, bidder: dict, tender: dict) -> dict:
+    # Голос, отданный прежней версии, не переносится на новую: после правки и отката кворум набирается заново
+    bid = await call(client.post("/api/bids/new", params=bidder, json={
+        "tender_id": tender["id"], "title": "Bid vote", "description": "First", "amount": 100
+    }))
+    await call(client.patch(f"/api/bids/{bid['id']}/status", params={**bidder, "new_status": "PUBLISHED"}))
+    steps = {"approve v1": await decide(client, owners[0], bid, "APPROVED")}
+    bid = await with_approvals(await call(client.patch(f"/api/bids/{bid['id']}/edit", params=bidder, json={
+        "title": "Bid vote two", "description": "Second", "amount": 200
+    })))
+    steps["edited"] = normalize([bid])
+    steps["approve v2"] = await decide(client, owners[0], bid, "APPROVED")
+    bid = await with_approvals(await call(client.put(f"/api/bids/{bid['id']}/rollback/1", params=bidder)))
+    steps["rolled back"] = normalize([bid])
+    steps["approve v3"] = await decide(client, owners[0], bid, "APPROVED")
+    steps["approve v3 again"] = await decide(client, owners[0], bid, "APPROVED")
+    steps["quorum v3"] = await decide(client, owners[1], bid, "APPROVED")
+    listed = await call(client.get("/api/bids/my", params={**bidder, "fields": "id,title,status,version,decisions"}))
+    steps["approved"] = normalize([await with_approvals(next(item for item in listed if item["id"] == bid["id"]))])
+    return steps
+
+
+async def operations(client: httpx.AsyncClient, owners: list, bidder: dict) -> dict:
+    owner = owners[0]
+    # Смена статуса и решение меняют текущую версию на месте, правка и откат создают новую
+    tender = await call(client.post("/api/tenders/new", params=owner, json={
+        "title": "Tender one", "description": "First", "service_type": "Construction"
+    }))
+    await call(client.patch(f"/api/tenders/{tender['id']}/status", params={**owner, "new_status": "PUBLISHED"}))
+    bid = await call(client.post("/api/bids/new", params=bidder, json={
+        "tender_id": tender["id"], "title": "Bid one", "description": "First", "amount": 100
+    }))
+    await call(client.patch(f"/api/bids/{bid['id']}/status", params={**bidder, "new_status": "PUBLISHED"}))
+    bid = await call(client.patch(f"/api/bids/{bid['id']}/edit", params=bidder, json={
+        "title": "Bid two", "description": "Second", "amount": 200
+    }))
+    await call(client.post("/api/bids/submit_decision", params={**owner, "bid_id": bid["id"], "decision": "REJECTED"}))
+    bid = await call(client.put(f"/api/bids/{bid['id']}/rollback/1", params=bidder))
+
+    tender = await call(client.patch(f"/api/tenders/{tender['id']}/edit", params=owner, json={
+        "title": "Tender two", "description": "Second"
+    }))
+    await call(client.patch(f"/api/tenders/{tender['id']}/status", params={**owner, "new_status": "CLOSED"}))
+    tender = await call(client.put(f"/api/tenders/{tender['id']}/rollback/1", params=owner))
+
+    tender_path, bid_path = f"/api/tenders/{tender['id']}/versions", f"/api/bids/{bid['id']}/versions"
+    return {
+        "tender rollback": normalize([tender]),
+        "bid rollback": normalize([await with_approvals(bid)]),
+        "tender versions": normalize(await call(client.get(tender_path, params=owner))),
+        "bid versions": normalize(await call(client.get(bid_path, params=bidder))),
+        "tender versions by page": normalize(await paged_versions(client, tender_path, owner)),
+        "bid versions by page": normalize(await paged_versions(client, bid_path, bidder)),
+        **{f"approvals: {step}": result for step, result in (await approvals(client, owners, bidder, tender)).items()}
+    }
+
+
+async def run_operations() -> dict:
+    async with app.router.lifespan_context(app):
+        # Два ответственных организации тендера: кворум 2, одно одобрение не завершает голосование
+        data = await seed(engine, SeedConfig(organizations=2, employees=2, tenders=0, bids=0, decisions=0, reviews=0))
+        owners = [{"username": user.username} for user in data.responsible(0)]
+        bidder = {"username": data.responsible(1)[0].username}
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://versions") as client:
+                return await operations(client, owners, bidder)
+        finally:
+            await clear(engine)
+
+
+def run_storage(storage: str) -> dict:
+    # Режим хранения читается при импорте приложения, поэтому каждый режим — отдельный процесс
+    completed = subprocess.run([sys.executable, "-m", "backend.benchmark.versions", "--storage", storage],
+                               env={**os.environ, "VERSION_STORAGE": storage}, capture_output=True, text=True)
+    if completed.returncode:
+        print(completed.stdout + completed.stderr)
+        sys.exit(completed.returncode)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def main():
+    args = parse_args()
+    if args.storage:
+        print(json.dumps(asyncio.run(run_operations())))
+        return
+
+    results = {storage: run_storage(storage) for storage in STORAGES}
+    failed = False
+    for name, expected in results["rows"].items():
+        for storage, result in results.items():
+            if result[name] != expected:
+                failed = True
+                print(f"{name}: {storage} differs from rows\n  rows:  {expected}\n  {storage}: {result[name]}")
+        if results["rows"][name.replace(" by page", "")] != expected:
+            failed = True
+            print(f"{name}: pages differ from the full list")
+    print("Version history differs between storage modes" if failed else "Version history matches in all modes")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
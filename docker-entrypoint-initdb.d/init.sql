@@ -59,10 +59,14 @@ CREATE TABLE tender (
     status tender_status DEFAULT 'CREATED',
     service_type service_type_enum NOT NULL,
     version INT DEFAULT 1,
+    is_current BOOLEAN NOT NULL DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Только одна текущая (последняя) версия на tender_root_id
+CREATE UNIQUE INDEX ix_tender_current_root ON tender (tender_root_id) WHERE is_current;
+
 
 -- Статус предложения
 CREATE TYPE bid_status AS ENUM (
@@ -91,11 +95,15 @@ CREATE TABLE bid (
     description TEXT,
     status bid_status DEFAULT 'CREATED',
     version INT DEFAULT 1,
+    is_current BOOLEAN NOT NULL DEFAULT TRUE,
     quorum INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Только одна текущая (последняя) версия на bid_root_id
+CREATE UNIQUE INDEX ix_bid_current_root ON bid (bid_root_id) WHERE is_current;
+
 -- Создание таблицы для решений по предложениям
 CREATE TABLE bid_decision (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),